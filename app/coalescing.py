@@ -0,0 +1,88 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable
+
+from fastapi.concurrency import run_in_threadpool
+
+
+class SingleFlight:
+    """
+    Схлопывание одинаковых одновременных запросов внутри одного воркера:
+    первый запрос с данным ключом вычисляет результат, остальные ждут его
+    и получают тот же объект (или то же исключение).
+
+    do — для потоков (ожидающий блокирует свой поток), do_async — для
+    async-кода: ожидающие не занимают потоков вовсе.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+        self._tasks: dict[Hashable, asyncio.Task] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is None:
+                future = Future()
+                self._calls[key] = future
+                self.executed += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Синхронная fn выполняется в пуле потоков один раз на ключ,
+        все запросы (и лидер) ждут общую задачу в event loop.
+        Отмена запроса-лидера не отменяет вычисление для остальных.
+        """
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is None:
+                task = asyncio.ensure_future(run_in_threadpool(fn))
+                self._tasks[key] = task
+                task.add_done_callback(lambda done: self._release(key, done))
+                self.executed += 1
+            else:
+                self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _release(self, key: Hashable, task: asyncio.Task) -> None:
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+        # Исключение уже получили ожидающие; если их не осталось — не логируем его как потерянное
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls) + len(self._tasks),
+            }
+
+
+# Общий экземпляр для чтений графа
+read_coalescer = SingleFlight()
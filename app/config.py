@@ -0,0 +1,65 @@
+import os
+import tempfile
+
+
+DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"postgresql://{os.getenv('POSTGRES_USER','postgres')}:"
+    f"{os.getenv('POSTGRES_PASSWORD','postgres')}@"
+    f"{os.getenv('DB_HOST','db')}:"
+    f"{os.getenv('DB_PORT','5432')}/"
+    f"{os.getenv('POSTGRES_DB','graphs_db')}"
+)
+
+# Применять миграции Alembic при старте приложения (в lifespan).
+# Можно отключить и запускать `alembic upgrade head` отдельным шагом деплоя.
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "true").lower() in ("1", "true", "yes")
+
+# Реплика для чтения; если не задана — чтение идёт в основную БД
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL") or DATABASE_URL
+
+# Сколько секунд после изменения клиент читает из основной БД (read-your-writes).
+# 0 — отключено, все GET идут в реплику.
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+LAST_WRITE_COOKIE = "last_write"
+
+# Продакшен-сервер (app/server.py)
+WEB_HOST = os.getenv("WEB_HOST", "0.0.0.0")
+WEB_PORT = int(os.getenv("WEB_PORT", "8000"))
+# По умолчанию — по одному воркеру на ядро CPU
+WEB_WORKERS = max(1, int(os.getenv("WEB_WORKERS", "0")) or (os.cpu_count() or 1))
+WEB_BACKLOG = int(os.getenv("WEB_BACKLOG", "2048"))
+# Keep-alive должен быть дольше, чем у балансировщика перед сервисом
+WEB_KEEPALIVE_SECONDS = int(os.getenv("WEB_KEEPALIVE_SECONDS", "75"))
+WEB_GRACEFUL_TIMEOUT_SECONDS = int(os.getenv("WEB_GRACEFUL_TIMEOUT_SECONDS", "30"))
+WEB_ACCESS_LOG = os.getenv("WEB_ACCESS_LOG", "false").lower() in ("1", "true", "yes")
+# С каких адресов доверять X-Forwarded-For/-Proto (через запятую, "*" — с любых).
+# По умолчанию, как у uvicorn, — только локальный прокси
+WEB_FORWARDED_ALLOW_IPS = os.getenv("WEB_FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+# Фоновая загрузка больших графов (app/ingestion.py)
+INGEST_DIR = os.getenv("INGEST_DIR") or os.path.join(tempfile.gettempdir(), "dag-ingest")
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+# Фоновый поток разбирает файл целиком в памяти (тело + модели pydantic,
+# которые в несколько раз больше JSON), поэтому лимит — с запасом
+# по памяти воркера на INGEST_WORKERS одновременных задач
+INGEST_MAX_BYTES = int(os.getenv("INGEST_MAX_BYTES", str(256 * 1024 ** 2)))
+
+# Пул соединений: общий бюджет на сервер делится между воркерами,
+# чтобы N воркеров вместе не превысили max_connections у Postgres
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "80"))
+DB_WORKER_CONNECTIONS = max(2, DB_MAX_CONNECTIONS // WEB_WORKERS)
+# Из доли воркера соединения фоновой загрузки идут в отдельный пул
+# (не больше половины), остальные — запросам
+DB_INGEST_POOL_SIZE = max(1, min(INGEST_WORKERS, DB_WORKER_CONNECTIONS // 2))
+DB_POOL_SIZE = max(1, DB_WORKER_CONNECTIONS - DB_INGEST_POOL_SIZE)
+DB_POOL_TIMEOUT_SECONDS = int(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")
+
+# Снимки графов в mmap-файлах (app/snapshots.py), общие для всех воркеров.
+# Каталог должен быть общим для воркеров одного сервера (tmpfs — идеально).
+SNAPSHOTS_ENABLED = os.getenv("SNAPSHOTS_ENABLED", "true").lower() in ("1", "true", "yes")
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR") or os.path.join(tempfile.gettempdir(), "dag-snapshots")
+# Сколько снимков держит открытыми один воркер (по дескриптору и mmap на снимок)
+SNAPSHOT_CACHE_SIZE = int(os.getenv("SNAPSHOT_CACHE_SIZE", "256"))
@@ -1,27 +1,114 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import time
+from functools import lru_cache
 
+from fastapi import Request
+from sqlalchemy import MetaData, create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker, declarative_base
 
-DATABASE_URL = os.getenv(
-    "DATABASE_URL",
-    f"postgresql://{os.getenv('POSTGRES_USER','postgres')}:"
-    f"{os.getenv('POSTGRES_PASSWORD','postgres')}@"
-    f"{os.getenv('DB_HOST','db')}:"
-    f"{os.getenv('DB_PORT','5432')}/"
-    f"{os.getenv('POSTGRES_DB','graphs_db')}"
+from app.config import (
+    DATABASE_URL,
+    READ_DATABASE_URL,
+    READ_YOUR_WRITES_SECONDS,
+    LAST_WRITE_COOKIE,
+    DB_POOL_SIZE,
+    DB_INGEST_POOL_SIZE,
+    DB_POOL_TIMEOUT_SECONDS,
+    DB_POOL_RECYCLE_SECONDS,
+    DB_ECHO,
 )
 
 
-engine = create_engine(DATABASE_URL, echo=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _make_engine(url: str, pool_size: int = DB_POOL_SIZE):
+    # Размер пула — доля общего бюджета соединений на один воркер
+    return create_engine(
+        url,
+        echo=DB_ECHO,
+        pool_size=pool_size,
+        max_overflow=0,
+        pool_timeout=DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=True,
+    )
+
+
+# Движки создаются лениво, при первом обращении к БД, а не при импорте
+@lru_cache(maxsize=None)
+def get_engine() -> Engine:
+    return _make_engine(DATABASE_URL)
+
+
+@lru_cache(maxsize=None)
+def get_read_engine() -> Engine:
+    # Отдельный движок для реплики; без реплики используем основной
+    if READ_DATABASE_URL == DATABASE_URL:
+        return get_engine()
+    return _make_engine(READ_DATABASE_URL)
+
+
+@lru_cache(maxsize=None)
+def get_ingest_engine() -> Engine:
+    # Фоновая загрузка держит соединение на всю задачу — отдельный пул,
+    # чтобы она не отнимала соединения у запросов
+    return _make_engine(DATABASE_URL, pool_size=DB_INGEST_POOL_SIZE)
+
+
+def dispose_engines() -> None:
+    for factory in (get_read_engine, get_ingest_engine, get_engine):
+        if factory.cache_info().currsize:
+            factory().dispose()
+            factory.cache_clear()
+
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 
-Base = declarative_base()
+# Имена ограничений совпадают с именами Postgres по умолчанию,
+# чтобы миграции могли ссылаться на них и в базах, созданных через create_all
+Base = declarative_base(metadata=MetaData(naming_convention={
+    "ix": "ix_%(table_name)s_%(column_0_name)s",
+    "pk": "%(table_name)s_pkey",
+    "fk": "%(table_name)s_%(column_0_name)s_fkey",
+}))
+
+
+def run_migrations() -> None:
+    # alembic импортируем здесь, чтобы не замедлять импорт приложения
+    from alembic import command
+    from alembic.config import Config
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    config = Config(os.path.join(root, "alembic.ini"))
+    # Логирование приложения остаётся как есть (см. migrations/env.py)
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
 
 
 def get_db():
-    db = SessionLocal()
+    db = SessionLocal(bind=get_engine())
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def wants_primary(request: Request) -> bool:
+    """
+    Read-your-writes: если клиент недавно что-то изменял (cookie last_write),
+    его чтения идут в основную БД, пока реплика не догонит.
+    """
+    if READ_YOUR_WRITES_SECONDS <= 0:
+        return False
+    try:
+        last_write = float(request.cookies.get(LAST_WRITE_COOKIE, ""))
+    except ValueError:
+        return False
+    return time.time() - last_write < READ_YOUR_WRITES_SECONDS
+
+
+def get_read_db(request: Request):
+    db = SessionLocal(bind=get_engine() if wants_primary(request) else get_read_engine())
     try:
         yield db
     finally:
@@ -0,0 +1,134 @@
+"""
+Асинхронная загрузка больших графов.
+
+Тело запроса потоково пишется во временный файл, клиент сразу получает
+202 и id задачи. Разбор, валидация и запись в БД выполняются в пуле
+фоновых потоков; состояние задачи хранится в таблице ingest_jobs,
+поэтому GET /jobs/{id} отвечает с любого воркера.
+"""
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+import app.services as services
+from app.config import INGEST_DIR, INGEST_MAX_BYTES, DB_INGEST_POOL_SIZE
+from app.database import SessionLocal, get_ingest_engine
+from app.models import IngestJob
+from app.schemas import GraphCreate
+
+logger = logging.getLogger(__name__)
+
+# Статусы задачи и соответствующий прогресс
+QUEUED, PARSING, PERSISTING, DONE, FAILED = "queued", "parsing", "persisting", "done", "failed"
+_PROGRESS = {QUEUED: 0.0, PARSING: 0.1, PERSISTING: 0.5, DONE: 1.0}
+
+_executor: ThreadPoolExecutor | None = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        # По потоку на соединение пула загрузки: задачи не ждут соединение из пула
+        _executor = ThreadPoolExecutor(max_workers=DB_INGEST_POOL_SIZE, thread_name_prefix="ingest")
+    return _executor
+
+
+def shutdown() -> None:
+    # Дожидаемся уже принятых задач при остановке воркера
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+async def _stream_to_file(request: Request, path: str) -> None:
+    # Файловые операции — в пуле потоков, чтобы не блокировать event loop
+    size = 0
+    f = await run_in_threadpool(open, path, "wb")
+    try:
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > INGEST_MAX_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Payload exceeds {INGEST_MAX_BYTES} bytes."
+                )
+            await run_in_threadpool(f.write, chunk)
+    finally:
+        await run_in_threadpool(f.close)
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _create_job(db: Session, job_id: str) -> IngestJob:
+    job = IngestJob(id=job_id, status=QUEUED, progress=_PROGRESS[QUEUED])
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+async def submit(request: Request, db: Session) -> IngestJob:
+    """Принимает тело запроса без разбора и ставит задачу в очередь."""
+    await run_in_threadpool(os.makedirs, INGEST_DIR, exist_ok=True)
+    job_id = uuid.uuid4().hex
+    path = os.path.join(INGEST_DIR, f"{job_id}.json")
+    try:
+        await _stream_to_file(request, path)
+        job = await run_in_threadpool(_create_job, db, job_id)
+    except BaseException:
+        await run_in_threadpool(_remove_file, path)
+        raise
+
+    _get_executor().submit(run_job, job_id, path)
+    return job
+
+
+def _set_status(db: Session, job_id: str, status_: str, **fields) -> None:
+    db.query(IngestJob).filter_by(id=job_id).update(
+        {"status": status_, "progress": _PROGRESS.get(status_, 0.0), **fields},
+        synchronize_session=False,
+    )
+    db.commit()
+
+
+def run_job(job_id: str, path: str) -> None:
+    db = SessionLocal(bind=get_ingest_engine())
+    try:
+        _set_status(db, job_id, PARSING)
+        # Файл разбирается целиком в памяти, размер ограничен INGEST_MAX_BYTES
+        with open(path, "rb") as f:
+            graph_data = GraphCreate.model_validate_json(f.read())
+
+        _set_status(db, job_id, PERSISTING)
+        graph = services.create_graph(db, graph_data)
+        _set_status(db, job_id, DONE, graph_id=graph.id)
+    except (HTTPException, ValidationError) as exc:
+        db.rollback()
+        error = exc.detail if isinstance(exc, HTTPException) else str(exc)
+        _set_status(db, job_id, FAILED, error=error)
+    except Exception as exc:
+        logger.exception("Ingest job %s failed", job_id)
+        db.rollback()
+        _set_status(db, job_id, FAILED, error=f"Internal error: {type(exc).__name__}")
+    finally:
+        db.close()
+        _remove_file(path)
+
+
+def get_job(db: Session, job_id: str) -> IngestJob:
+    job = db.query(IngestJob).filter_by(id=job_id).first()
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
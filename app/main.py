@@ -1,16 +1,32 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.database import engine, Base
+from app.config import DB_AUTO_MIGRATE, READ_YOUR_WRITES_SECONDS, LAST_WRITE_COOKIE
+from app.database import dispose_engines, run_migrations
+import app.ingestion as ingestion
 from app.routes import graph_router
 
+
+# Схема БД управляется миграциями Alembic (migrations/), а не create_all при импорте
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if DB_AUTO_MIGRATE:
+        await run_in_threadpool(run_migrations)
+    yield
+    await run_in_threadpool(ingestion.shutdown)
+    dispose_engines()
+
+
 app = FastAPI(
     title="DAG Graph Service",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
-Base.metadata.create_all(bind=engine)
-
 # CORS — если будешь использовать фронтенд или Postman
 app.add_middleware(
     CORSMiddleware,
@@ -21,9 +37,29 @@ app.add_middleware(
 )
 
 
+# Read-your-writes — после успешного изменения помечаем клиента,
+# чтобы его ближайшие GET читали из основной БД, а не из реплики
+@app.middleware("http")
+async def mark_last_write(request: Request, call_next):
+    response = await call_next(request)
+    if (
+        READ_YOUR_WRITES_SECONDS > 0
+        and request.method not in ("GET", "HEAD", "OPTIONS")
+        and response.status_code < 400
+    ):
+        response.set_cookie(
+            LAST_WRITE_COOKIE,
+            str(time.time()),
+            max_age=int(READ_YOUR_WRITES_SECONDS) + 1,
+            httponly=True,
+        )
+    return response
+
+
 app.include_router(graph_router, prefix="/api")
 
 
+# Режим разработки; для продакшена — python -m app.server
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8080, reload=True)
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Boolean, Column, Integer, String, Float, DateTime, ForeignKey, false, func
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -8,9 +8,13 @@ class Graph(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True)
+    # Увеличивается при каждом изменении графа
+    version = Column(Integer, nullable=False, default=0, server_default="0")
 
-    nodes = relationship("Node", back_populates="graph", cascade="all, delete-orphan")
-    edges = relationship("Edge", back_populates="graph", cascade="all, delete-orphan")
+    # passive_deletes: дочерние строки удаляет сама БД (ON DELETE CASCADE),
+    # ORM не загружает их в память перед удалением
+    nodes = relationship("Node", back_populates="graph", cascade="all, delete-orphan", passive_deletes=True)
+    edges = relationship("Edge", back_populates="graph", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class Node(Base):
@@ -18,20 +22,22 @@ class Node(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
-    graph_id = Column(Integer, ForeignKey("graphs.id"))
+    graph_id = Column(Integer, ForeignKey("graphs.id", ondelete="CASCADE"), index=True)
 
     graph = relationship("Graph", back_populates="nodes")
     outgoing = relationship(
         "Edge",
         back_populates="from_node",
         foreign_keys="Edge.from_node_id",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
     incoming = relationship(
         "Edge",
         back_populates="to_node",
         foreign_keys="Edge.to_node_id",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
 
 
@@ -39,9 +45,9 @@ class Edge(Base):
     __tablename__ = "edges"
 
     id = Column(Integer, primary_key=True)
-    from_node_id = Column(Integer, ForeignKey("nodes.id"), nullable=False)
-    to_node_id   = Column(Integer, ForeignKey("nodes.id"), nullable=False)
-    graph_id     = Column(Integer, ForeignKey("graphs.id"), nullable=False)
+    from_node_id = Column(Integer, ForeignKey("nodes.id", ondelete="CASCADE"), nullable=False, index=True)
+    to_node_id   = Column(Integer, ForeignKey("nodes.id", ondelete="CASCADE"), nullable=False, index=True)
+    graph_id     = Column(Integer, ForeignKey("graphs.id", ondelete="CASCADE"), nullable=False, index=True)
 
     from_node = relationship(
         "Node",
@@ -54,3 +60,37 @@ class Edge(Base):
         foreign_keys=[to_node_id]
     )
     graph = relationship("Graph", back_populates="edges")
+
+
+class GraphStats(Base):
+    """
+    Сводка по графу для каталога. Обновляется инкрементально при изменениях,
+    поэтому список графов со статистикой — один запрос без загрузки графов.
+    """
+    __tablename__ = "graph_stats"
+
+    graph_id = Column(Integer, ForeignKey("graphs.id", ondelete="CASCADE"), primary_key=True)
+    node_count = Column(Integer, nullable=False, default=0)
+    edge_count = Column(Integer, nullable=False, default=0)
+    source_count = Column(Integer, nullable=False, default=0)
+    sink_count = Column(Integer, nullable=False, default=0)
+    max_in_degree = Column(Integer, nullable=False, default=0)
+    max_out_degree = Column(Integer, nullable=False, default=0)
+    # Длина самого длинного пути в рёбрах
+    depth = Column(Integer, nullable=False, default=0)
+    # После удалений глубина может быть завышена: её пересчитывает и сохраняет
+    # первое чтение каталога (или следующая запись, загружающая граф целиком)
+    depth_stale = Column(Boolean, nullable=False, default=False, server_default=false())
+
+
+class IngestJob(Base):
+    """Фоновая загрузка графа: состояние хранится в БД, чтобы его видел любой воркер."""
+    __tablename__ = "ingest_jobs"
+
+    id = Column(String(32), primary_key=True)
+    status = Column(String, nullable=False)
+    progress = Column(Float, nullable=False, default=0.0, server_default="0")
+    graph_id = Column(Integer, ForeignKey("graphs.id", ondelete="SET NULL"), nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
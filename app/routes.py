@@ -1,23 +1,99 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.coalescing import read_coalescer
+from app.database import SessionLocal, get_db, get_read_db
+import app.ingestion as ingestion
 import app.schemas as schemas
 import app.services as services
 
 graph_router = APIRouter()
 
+
+def _read_version(db: Session, graph_id: int) -> int:
+    version = services.get_graph_version(db, graph_id)
+    # Завершаем транзакцию до ожидания: иначе каждый ожидающий держит
+    # соединение из пула и схлопывание упирается в размер пула
+    db.rollback()
+    return version
+
+
+async def _coalesced(db: Session, endpoint: str, graph_id: int, fn):
+    """
+    Чтение графа со схлопыванием: ожидающие запросы не занимают ни соединений,
+    ни потоков пула — в потоке выполняются только чтение версии и вычисление лидера.
+    """
+    version = await run_in_threadpool(_read_version, db, graph_id)
+    bind = db.get_bind()
+
+    def compute():
+        # Своя сессия: сессию запроса-лидера закроют, если клиент отключится,
+        # а вычисление продолжается для остальных. Прочитанная версия
+        # передаётся в fn, чтобы не запрашивать её повторно.
+        session = SessionLocal(bind=bind)
+        try:
+            return fn(session, graph_id, version)
+        finally:
+            session.close()
+
+    return await read_coalescer.do_async((endpoint, graph_id, version), compute)
+
+
 # ГРАФЫ
 
 
 @graph_router.post("/graph/", response_model=schemas.GraphOut, status_code=status.HTTP_201_CREATED)
 def create_graph(graph_in: schemas.GraphCreate, db: Session = Depends(get_db)):
-    return services.create_graph(db, graph_in)
+    graph = services.create_graph(db, graph_in)
+    # ORM-рёбра ссылаются на объекты Node, а в ответе нужны имена вершин
+    return services.get_graph_details(db, graph.id)
+
+
+# Тело не объявлено параметром, чтобы FastAPI не разбирал его в память;
+# схема в OpenAPI та же, что у POST /graph/
+@graph_router.post(
+    "/graph/async",
+    response_model=schemas.JobOut,
+    status_code=status.HTTP_202_ACCEPTED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": {"$ref": "#/components/schemas/GraphCreate"}}},
+        }
+    },
+)
+async def create_graph_async(request: Request, response: Response, db: Session = Depends(get_db)):
+    job = await ingestion.submit(request, db)
+    response.headers["Location"] = str(request.url_for("get_job", job_id=job.id))
+    return job
+
+
+@graph_router.get("/graphs", response_model=list[schemas.GraphSummary])
+def list_graphs(
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db),
+    primary: Session = Depends(get_db),
+):
+    # Сессия основной БД подключается, только если нужно сохранить пересчитанную глубину
+    return services.list_graphs(db, limit, offset, primary)
 
 
 @graph_router.get("/graph/{graph_id}", response_model=schemas.GraphDetail)
-def get_graph(graph_id: int, db: Session = Depends(get_db)):
-    return services.get_graph_details(db, graph_id)
+async def get_graph(graph_id: int, db: Session = Depends(get_read_db)):
+    return await _coalesced(db, "graph", graph_id, lambda db, graph_id, _: services.get_graph_details(db, graph_id))
+
+
+@graph_router.put("/graph/{graph_id}", response_model=schemas.GraphDiff)
+def sync_graph(graph_id: int, graph_in: schemas.GraphCreate, db: Session = Depends(get_db)):
+    return services.sync_graph(db, graph_id, graph_in)
+
+
+@graph_router.delete("/graph/{graph_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_graph(graph_id: int, db: Session = Depends(get_db)):
+    services.delete_graph(db, graph_id)
+
 
 # ВЕРШИНЫ
 
@@ -27,9 +103,14 @@ def add_node(graph_id: int, node_in: schemas.NodeCreate, db: Session = Depends(g
     return services.add_node(db, graph_id, node_in)
 
 
+@graph_router.delete("/graph/{graph_id}/node/{node_name}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_node(graph_id: int, node_name: str, db: Session = Depends(get_db)):
+    services.delete_node(db, graph_id, node_name)
+
+
 @graph_router.get("/graph/{graph_id}/nodes", response_model=list[schemas.NodeOut])
-def list_nodes(graph_id: int, db: Session = Depends(get_db)):
-    return services.get_nodes(db, graph_id)
+async def list_nodes(graph_id: int, db: Session = Depends(get_read_db)):
+    return await _coalesced(db, "nodes", graph_id, services.get_nodes)
 
 # РЁБРА
 
@@ -39,18 +120,37 @@ def add_edge(graph_id: int, edge_in: schemas.EdgeCreate, db: Session = Depends(g
     return services.add_edge(db, graph_id, edge_in)
 
 
+@graph_router.delete("/graph/{graph_id}/edges", response_model=schemas.DeleteResult)
+def delete_edges(graph_id: int, edges_in: list[schemas.EdgeCreate], db: Session = Depends(get_db)):
+    return services.delete_edges(db, graph_id, edges_in)
+
+
 @graph_router.get("/graph/{graph_id}/edges", response_model=list[schemas.EdgeOut])
-def list_edges(graph_id: int, db: Session = Depends(get_db)):
-    return services.get_edges(db, graph_id)
+async def list_edges(graph_id: int, db: Session = Depends(get_read_db)):
+    return await _coalesced(db, "edges", graph_id, services.get_edges)
 
 # ПРЕДСТАВЛЕНИЕ ГРАФА
 
 
 @graph_router.get("/graph/{graph_id}/adjacency", response_model=schemas.AdjacencyList)
-def get_adjacency_list(graph_id: int, db: Session = Depends(get_db)):
-    return services.get_adjacency_list(db, graph_id)
+async def get_adjacency_list(graph_id: int, db: Session = Depends(get_read_db)):
+    return await _coalesced(db, "adjacency", graph_id, services.get_adjacency_list)
 
 
 @graph_router.get("/graph/{graph_id}/transposed", response_model=schemas.AdjacencyList)
-def get_transposed_adjacency_list(graph_id: int, db: Session = Depends(get_db)):
-    return services.get_transposed_adjacency_list(db, graph_id)
+async def get_transposed_adjacency_list(graph_id: int, db: Session = Depends(get_read_db)):
+    return await _coalesced(db, "transposed", graph_id, services.get_transposed_adjacency_list)
+
+# ЗАДАЧИ
+
+
+@graph_router.get("/jobs/{job_id}", response_model=schemas.JobOut)
+def get_job(job_id: str, db: Session = Depends(get_db)):
+    return ingestion.get_job(db, job_id)
+
+# МЕТРИКИ
+
+
+@graph_router.get("/metrics/coalescing", response_model=schemas.CoalescingStats)
+def get_coalescing_stats():
+    return read_coalescer.stats()
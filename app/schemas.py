@@ -1,4 +1,5 @@
-from typing import List, Dict
+from datetime import datetime
+from typing import List, Dict, Optional
 from pydantic import BaseModel, Field, constr
 
 
@@ -58,3 +59,47 @@ EdgeOut = EdgeRead
 
 class AdjacencyList(BaseModel):
     adjacency: Dict[str, List[str]]
+
+
+class GraphSummary(BaseModel):
+    id: int
+    name: str
+    version: int
+    node_count: int
+    edge_count: int
+    source_count: int
+    sink_count: int
+    max_in_degree: int
+    max_out_degree: int
+    depth: int
+
+
+class GraphDiff(BaseModel):
+    nodes_added: int
+    nodes_removed: int
+    edges_added: int
+    edges_removed: int
+
+
+class DeleteResult(BaseModel):
+    deleted: int
+
+
+class CoalescingStats(BaseModel):
+    executed: int
+    coalesced: int
+    in_flight: int
+
+
+class JobOut(BaseModel):
+    id: str
+    status: str
+    progress: float
+    graph_id: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = {
+        "from_attributes": True
+    }
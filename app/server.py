@@ -0,0 +1,46 @@
+"""
+Продакшен-запуск сервиса: несколько воркеров uvicorn, uvloop + httptools,
+настроенные keep-alive/backlog и корректное завершение.
+
+    python -m app.server
+
+Все параметры берутся из переменных окружения (см. app/config.py).
+"""
+import os
+
+import uvicorn
+
+from app.config import (
+    WEB_HOST,
+    WEB_PORT,
+    WEB_WORKERS,
+    WEB_BACKLOG,
+    WEB_KEEPALIVE_SECONDS,
+    WEB_GRACEFUL_TIMEOUT_SECONDS,
+    WEB_ACCESS_LOG,
+    WEB_FORWARDED_ALLOW_IPS,
+)
+
+
+def main() -> None:
+    # Воркеры — отдельные процессы: передаём им итоговое число воркеров,
+    # чтобы каждый посчитал свою долю пула соединений (DB_POOL_SIZE)
+    os.environ["WEB_WORKERS"] = str(WEB_WORKERS)
+
+    uvicorn.run(
+        "app.main:app",
+        host=WEB_HOST,
+        port=WEB_PORT,
+        workers=WEB_WORKERS,
+        loop="uvloop",
+        http="httptools",
+        backlog=WEB_BACKLOG,
+        timeout_keep_alive=WEB_KEEPALIVE_SECONDS,
+        timeout_graceful_shutdown=WEB_GRACEFUL_TIMEOUT_SECONDS,
+        access_log=WEB_ACCESS_LOG,
+        forwarded_allow_ips=WEB_FORWARDED_ALLOW_IPS,
+    )
+
+
+if __name__ == "__main__":
+    main()
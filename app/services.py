@@ -1,14 +1,18 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, distinct, exists, func, insert, or_, select, text, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
 from fastapi import HTTPException, status
 
 import app.schemas as schemas
-from app.models import Graph, Node, Edge
+from app.config import SNAPSHOTS_ENABLED
+from app.models import Graph, Node, Edge, GraphStats
+from app.snapshots import Snapshot, snapshot_store
 from app.schemas import GraphCreate, NodeCreate, EdgeCreate
 
-from collections import defaultdict, deque
+from collections import Counter, defaultdict, deque
 
 
-def create_graph(db: Session, graph_data: GraphCreate) -> Graph:
+def _validate_graph_payload(graph_data: GraphCreate) -> None:
     # Проверка на уникальность имён вершин внутри графа
     node_names = set()
     for node in graph_data.nodes:
@@ -19,23 +23,8 @@ def create_graph(db: Session, graph_data: GraphCreate) -> Graph:
             )
         node_names.add(node.name)
 
-    # Создаём граф
-    graph = Graph(name=graph_data.name)
-    db.add(graph)
-    db.flush()  # Чтобы получить graph.id
-
-    # Создаём вершины
-    node_objs = {}
-    for node in graph_data.nodes:
-        node_obj = Node(name=node.name, graph_id=graph.id)
-        db.add(node_obj)
-        node_objs[node.name] = node_obj
-
-    db.flush()  # Чтобы получить node.id
-
-    # Проверка на дубликаты рёбер и формирование объектов
+    # Проверка на дубликаты рёбер и существование вершин
     edge_set = set()
-    edge_objs = []
     for edge in graph_data.edges:
         key = (edge.from_node, edge.to_node)
         if key in edge_set:
@@ -45,20 +34,12 @@ def create_graph(db: Session, graph_data: GraphCreate) -> Graph:
             )
         edge_set.add(key)
 
-        if edge.from_node not in node_objs or edge.to_node not in node_objs:
+        if edge.from_node not in node_names or edge.to_node not in node_names:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Invalid edge: node '{edge.from_node}' or '{edge.to_node}' not found."
             )
 
-        edge_objs.append(
-            Edge(
-                from_node_id=node_objs[edge.from_node].id,
-                to_node_id=node_objs[edge.to_node].id,
-                graph_id=graph.id
-            )
-        )
-
     # Проверка на ацикличность
     if not is_acyclic(graph_data.nodes, graph_data.edges):
         raise HTTPException(
@@ -66,14 +47,127 @@ def create_graph(db: Session, graph_data: GraphCreate) -> Graph:
             detail="Graph must be acyclic (DAG)."
         )
 
-    # Сохраняем рёбра и возвращаем граф
+
+def create_graph(db: Session, graph_data: GraphCreate) -> Graph:
+    # Вся валидация — до записи в БД
+    _validate_graph_payload(graph_data)
+
+    # Создаём граф
+    graph = Graph(name=graph_data.name)
+    db.add(graph)
+    try:
+        db.flush()  # Чтобы получить graph.id
+    except IntegrityError:
+        # Уникальность имени проверяет сама БД — в том числе при параллельной загрузке
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Graph '{graph_data.name}' already exists."
+        )
+
+    # Создаём вершины
+    node_objs = {}
+    for node in graph_data.nodes:
+        node_obj = Node(name=node.name, graph_id=graph.id)
+        db.add(node_obj)
+        node_objs[node.name] = node_obj
+
+    db.flush()  # Чтобы получить node.id
+
+    edge_objs = [
+        Edge(
+            from_node_id=node_objs[edge.from_node].id,
+            to_node_id=node_objs[edge.to_node].id,
+            graph_id=graph.id
+        )
+        for edge in graph_data.edges
+    ]
+
+    # Сохраняем рёбра, статистику и возвращаем граф
     db.add_all(edge_objs)
+    db.add(GraphStats(graph_id=graph.id, **_graph_stats(
+        [n.name for n in graph_data.nodes],
+        [(e.from_node, e.to_node) for e in graph_data.edges],
+    )))
     db.commit()
     db.refresh(graph)
     db.expire_all()
     return graph
 
 
+def sync_graph(db: Session, graph_id: int, graph_data: GraphCreate) -> schemas.GraphDiff:
+    """
+    Приводит граф к переданному полному состоянию: считает разницу множеств
+    вершин и рёбер (линейно) и применяет только добавленное и удалённое
+    одной транзакцией. Неизменённые рёбра не переписываются.
+    """
+    _lock_graph(db, graph_id)
+    graph = db.query(Graph).filter_by(id=graph_id).first()
+    if not graph:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Graph not found")
+
+    # Валидируем только итоговый граф, в том числе на ацикличность
+    _validate_graph_payload(graph_data)
+
+    renamed = graph_data.name != graph.name
+    if renamed:
+        if db.query(Graph.id).filter_by(name=graph_data.name).first():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Graph '{graph_data.name}' already exists."
+            )
+        graph.name = graph_data.name
+
+    # Текущее состояние — только нужные колонки, без ORM-объектов
+    name_to_id = {name: id_ for id_, name in db.query(Node.id, Node.name).filter_by(graph_id=graph_id)}
+    id_to_name = {id_: name for name, id_ in name_to_id.items()}
+    current_edges = {
+        (id_to_name[from_id], id_to_name[to_id]): edge_id
+        for edge_id, from_id, to_id in db.query(Edge.id, Edge.from_node_id, Edge.to_node_id).filter_by(graph_id=graph_id)
+    }
+
+    desired_nodes = {n.name for n in graph_data.nodes}
+    desired_edges = {(e.from_node, e.to_node) for e in graph_data.edges}
+
+    nodes_added = [name for name in desired_nodes if name not in name_to_id]
+    nodes_removed = [name_to_id[name] for name in name_to_id if name not in desired_nodes]
+    edges_added = [key for key in desired_edges if key not in current_edges]
+    # Сюда попадают и рёбра удаляемых вершин: в желаемом состоянии их быть не может
+    edges_removed = [edge_id for key, edge_id in current_edges.items() if key not in desired_edges]
+
+    if edges_removed:
+        db.execute(delete(Edge).where(Edge.id.in_(edges_removed)))
+    if nodes_removed:
+        db.execute(delete(Node).where(Node.id.in_(nodes_removed)))
+    if nodes_added:
+        rows = db.execute(
+            insert(Node).returning(Node.id, Node.name),
+            [{"name": name, "graph_id": graph_id} for name in nodes_added],
+        )
+        name_to_id.update({name: id_ for id_, name in rows})
+    if edges_added:
+        db.execute(
+            insert(Edge),
+            [
+                {"from_node_id": name_to_id[from_name], "to_node_id": name_to_id[to_name], "graph_id": graph_id}
+                for from_name, to_name in edges_added
+            ],
+        )
+
+    if nodes_added or nodes_removed or edges_added or edges_removed or renamed:
+        _bump_version(db, graph_id)
+    # Итоговый граф уже в памяти — статистику считаем по нему, без чтения из БД
+    _save_stats(db, graph_id, _graph_stats(desired_nodes, list(desired_edges)))
+    db.commit()
+
+    return schemas.GraphDiff(
+        nodes_added=len(nodes_added),
+        nodes_removed=len(nodes_removed),
+        edges_added=len(edges_added),
+        edges_removed=len(edges_removed),
+    )
+
+
 def get_graph_details(db: Session, graph_id: int) -> schemas.GraphRead:
     # Получаем граф и связанные вершины/рёбра
     graph = db.query(Graph).filter_by(id=graph_id).first()
@@ -105,7 +199,57 @@ def get_graph_details(db: Session, graph_id: int) -> schemas.GraphRead:
     )
 
 
+def get_graph_version(db: Session, graph_id: int) -> int:
+    # Одна выборка по первичному ключу — заодно проверка наличия графа
+    version = db.query(Graph.version).filter_by(id=graph_id).scalar()
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Graph not found")
+    return version
+
+
+def _snapshot(db: Session, graph_id: int, version: int | None) -> Snapshot | None:
+    # Версия из БД — одна выборка по ключу (маршрут передаёт уже прочитанную);
+    # снимок пересобирается, только если устарел
+    if version is None:
+        version = get_graph_version(db, graph_id)
+    if not SNAPSHOTS_ENABLED:
+        return None
+    snapshot = snapshot_store.get(db, graph_id, version)
+    if snapshot is None:
+        # Граф удалили, пока собирался снимок
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Graph not found")
+    return snapshot
+
+
+# Пространство ключей advisory-блокировок графов. Двухаргументная форма
+# (int4, int4) не пересекается с одноаргументной (bigint), которой берётся
+# блокировка миграций (migrations/env.py)
+GRAPH_LOCK_NAMESPACE = 0x4441_4701
+
+
+def _lock_graph(db: Session, graph_id: int) -> None:
+    """
+    Транзакционная advisory-блокировка графа: писатели одного графа
+    выполняются по очереди (проверка ацикличности видит уже закоммиченные
+    рёбра соседа), писатели разных графов друг друга не ждут.
+    Снимается автоматически при commit/rollback.
+    """
+    db.execute(
+        text("SELECT pg_advisory_xact_lock(:namespace, :graph_id)"),
+        {"namespace": GRAPH_LOCK_NAMESPACE, "graph_id": graph_id},
+    )
+
+
+def _bump_version(db: Session, graph_id: int) -> None:
+    # Атомарный инкремент на стороне БД, без read-modify-write
+    db.query(Graph).filter_by(id=graph_id).update(
+        {Graph.version: Graph.version + 1}, synchronize_session=False
+    )
+
+
 def add_node(db: Session, graph_id: int, node_in: NodeCreate) -> schemas.NodeRead:
+    _lock_graph(db, graph_id)
+
     # Проверка наличия графа
     graph = db.query(Graph).filter_by(id=graph_id).first()
     if not graph:
@@ -121,21 +265,39 @@ def add_node(db: Session, graph_id: int, node_in: NodeCreate) -> schemas.NodeRea
 
     node = Node(name=node_in.name, graph_id=graph_id)
     db.add(node)
+    db.flush()
+    # Изолированная вершина — одновременно исток и сток
+    updated = db.query(GraphStats).filter_by(graph_id=graph_id).update(
+        {
+            GraphStats.node_count: GraphStats.node_count + 1,
+            GraphStats.source_count: GraphStats.source_count + 1,
+            GraphStats.sink_count: GraphStats.sink_count + 1,
+        },
+        synchronize_session=False,
+    )
+    if not updated:
+        _refresh_stats(db, graph_id)
+    _bump_version(db, graph_id)
     db.commit()
     db.refresh(node)
     return schemas.NodeRead.from_orm(node)
 
 
-def get_nodes(db: Session, graph_id: int) -> list[schemas.NodeRead]:
-    # Проверка наличия графа
-    if not db.query(Graph).filter_by(id=graph_id).first():
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Graph not found")
+def get_nodes(db: Session, graph_id: int, version: int | None = None) -> list[schemas.NodeRead]:
+    # Проверка наличия графа и чтение из снимка
+    snapshot = _snapshot(db, graph_id, version)
+    if snapshot is not None:
+        return [schemas.NodeRead(id=id_, name=name) for id_, name in snapshot.nodes()]
 
     nodes = db.query(Node).filter_by(graph_id=graph_id).all()
     return [schemas.NodeRead.from_orm(n) for n in nodes]
 
 
 def add_edge(db: Session, graph_id: int, edge_in: EdgeCreate) -> schemas.EdgeRead:
+    # Блокировка до любых чтений: иначе два параллельных ребра,
+    # каждое допустимое само по себе, могут вместе замкнуть цикл
+    _lock_graph(db, graph_id)
+
     # Проверка наличия графа
     if not db.query(Graph).filter_by(id=graph_id).first():
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Graph not found")
@@ -169,6 +331,7 @@ def add_edge(db: Session, graph_id: int, edge_in: EdgeCreate) -> schemas.EdgeRea
         EdgeCreate(from_node=id_to_name[e.from_node_id], to_node=id_to_name[e.to_node_id])
         for e in db.query(Edge).filter_by(graph_id=graph_id).all()
     ]
+    existing_pairs = [(e.from_node, e.to_node) for e in edge_creates]
     edge_creates.append(edge_in)
 
     if not is_acyclic(node_creates, edge_creates):
@@ -184,6 +347,9 @@ def add_edge(db: Session, graph_id: int, edge_in: EdgeCreate) -> schemas.EdgeRea
         graph_id=graph_id
     )
     db.add(edge)
+    db.flush()
+    _update_stats_for_edge(db, graph_id, list(name_to_id), existing_pairs, edge_in)
+    _bump_version(db, graph_id)
     db.commit()
     db.refresh(edge)
 
@@ -194,10 +360,14 @@ def add_edge(db: Session, graph_id: int, edge_in: EdgeCreate) -> schemas.EdgeRea
     )
 
 
-def get_edges(db: Session, graph_id: int) -> list[schemas.EdgeRead]:
-    # Проверка наличия графа
-    if not db.query(Graph).filter_by(id=graph_id).first():
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Graph not found")
+def get_edges(db: Session, graph_id: int, version: int | None = None) -> list[schemas.EdgeRead]:
+    # Проверка наличия графа и чтение из снимка
+    snapshot = _snapshot(db, graph_id, version)
+    if snapshot is not None:
+        return [
+            schemas.EdgeRead(id=id_, from_node=from_name, to_node=to_name)
+            for id_, from_name, to_name in snapshot.edges()
+        ]
 
     edges = db.query(Edge).filter_by(graph_id=graph_id).all()
     # Собираем id->name для вершин
@@ -214,38 +384,309 @@ def get_edges(db: Session, graph_id: int) -> list[schemas.EdgeRead]:
     ]
 
 
-def get_adjacency_list(db: Session, graph_id: int) -> schemas.AdjacencyList:
-    # Проверка наличия графа
-    if not db.query(Graph).filter_by(id=graph_id).first():
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Graph not found")
+def get_adjacency_list(db: Session, graph_id: int, version: int | None = None) -> schemas.AdjacencyList:
+    # Проверка наличия графа и чтение из снимка
+    snapshot = _snapshot(db, graph_id, version)
+    if snapshot is not None:
+        return schemas.AdjacencyList(adjacency=snapshot.adjacency())
 
-    nodes = db.query(Node).filter_by(graph_id=graph_id).all()
-    edges = db.query(Edge).filter_by(graph_id=graph_id).all()
+    nodes = db.query(Node.id, Node.name).filter_by(graph_id=graph_id).all()
+    edges = db.query(Edge.from_node_id, Edge.to_node_id).filter_by(graph_id=graph_id).all()
+    id_to_name = {id_: name for id_, name in nodes}
     # Инициализируем словарь
-    adj: dict[str, list[str]] = {n.name: [] for n in nodes}
-    for e in edges:
-        from_name = next(n.name for n in nodes if n.id == e.from_node_id)
-        adj[from_name].append(next(n.name for n in nodes if n.id == e.to_node_id))
+    adj: dict[str, list[str]] = {name: [] for _, name in nodes}
+    for from_id, to_id in edges:
+        adj[id_to_name[from_id]].append(id_to_name[to_id])
 
     return schemas.AdjacencyList(adjacency=adj)
 
 
-def get_transposed_adjacency_list(db: Session, graph_id: int) -> schemas.AdjacencyList:
-    # Проверка наличия графа
-    if not db.query(Graph).filter_by(id=graph_id).first():
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Graph not found")
+def get_transposed_adjacency_list(db: Session, graph_id: int, version: int | None = None) -> schemas.AdjacencyList:
+    # Проверка наличия графа и чтение из снимка
+    snapshot = _snapshot(db, graph_id, version)
+    if snapshot is not None:
+        return schemas.AdjacencyList(adjacency=snapshot.transposed())
 
-    nodes = db.query(Node).filter_by(graph_id=graph_id).all()
-    edges = db.query(Edge).filter_by(graph_id=graph_id).all()
+    nodes = db.query(Node.id, Node.name).filter_by(graph_id=graph_id).all()
+    edges = db.query(Edge.from_node_id, Edge.to_node_id).filter_by(graph_id=graph_id).all()
+    id_to_name = {id_: name for id_, name in nodes}
     # Инициализируем словарь
-    transposed: dict[str, list[str]] = {n.name: [] for n in nodes}
-    for e in edges:
-        to_name = next(n.name for n in nodes if n.id == e.to_node_id)
-        transposed[to_name].append(next(n.name for n in nodes if n.id == e.from_node_id))
+    transposed: dict[str, list[str]] = {name: [] for _, name in nodes}
+    for from_id, to_id in edges:
+        transposed[id_to_name[to_id]].append(id_to_name[from_id])
 
     return schemas.AdjacencyList(adjacency=transposed)
 
 
+def delete_graph(db: Session, graph_id: int) -> None:
+    # Один DELETE: вершины и рёбра удаляет ON DELETE CASCADE в БД
+    _lock_graph(db, graph_id)
+    result = db.execute(
+        delete(Graph).where(Graph.id == graph_id).execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Graph not found")
+    db.commit()
+    snapshot_store.discard(graph_id)
+
+
+def delete_node(db: Session, graph_id: int, node_name: str) -> None:
+    _lock_graph(db, graph_id)
+    get_graph_version(db, graph_id)
+
+    node_id = db.query(Node.id).filter_by(graph_id=graph_id, name=node_name).scalar()
+    if node_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Node '{node_name}' not found in graph {graph_id}."
+        )
+    # Инцидентные рёбра удаляем явно, а не каскадом: по ним считается статистика
+    _delete_edges_updating_stats(
+        db, graph_id, or_(Edge.from_node_id == node_id, Edge.to_node_id == node_id), deleted_node_id=node_id
+    )
+    db.execute(delete(Node).where(Node.id == node_id).execution_options(synchronize_session=False))
+    _bump_version(db, graph_id)
+    db.commit()
+
+
+def delete_edges(db: Session, graph_id: int, edges: list[EdgeCreate]) -> schemas.DeleteResult:
+    _lock_graph(db, graph_id)
+    get_graph_version(db, graph_id)
+
+    pairs = {(e.from_node, e.to_node) for e in edges}
+    if not pairs:
+        return schemas.DeleteResult(deleted=0)
+
+    # Один DELETE с подзапросом: пары имён сопоставляются с id вершин в БД
+    from_node, to_node = aliased(Node), aliased(Node)
+    edge_ids = (
+        select(Edge.id)
+        .join(from_node, Edge.from_node_id == from_node.id)
+        .join(to_node, Edge.to_node_id == to_node.id)
+        .where(Edge.graph_id == graph_id, tuple_(from_node.name, to_node.name).in_(pairs))
+    )
+    deleted = _delete_edges_updating_stats(db, graph_id, Edge.id.in_(edge_ids))
+    if deleted:
+        _bump_version(db, graph_id)
+    db.commit()
+    return schemas.DeleteResult(deleted=deleted)
+
+
+def list_graphs(
+    db: Session, limit: int, offset: int, primary: Session | None = None
+) -> list[schemas.GraphSummary]:
+    # Один запрос по первичным ключам — без загрузки вершин и рёбер
+    rows = (
+        db.query(Graph.id, Graph.name, Graph.version, GraphStats)
+        .join(GraphStats, GraphStats.graph_id == Graph.id)
+        .order_by(Graph.id)
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+    # Глубину, устаревшую после удалений, пересчитываем один раз и сохраняем
+    # в основной БД (primary) — следующие чтения каталога её уже не считают
+    stale = [id_ for id_, _, _, stats in rows if stats.depth_stale]
+    depths = _refresh_stale_depths(primary if primary is not None else db, stale) if stale else {}
+
+    summaries = []
+    for id_, name, version, stats in rows:
+        values = {field: getattr(stats, field) for field in STATS_FIELDS}
+        if id_ in depths:
+            values["depth"] = depths[id_]
+        summaries.append(schemas.GraphSummary(id=id_, name=name, version=version, **values))
+    return summaries
+
+
+def _refresh_stale_depths(db: Session, graph_ids: list[int]) -> dict[int, int]:
+    depths = {}
+    for graph_id in graph_ids:
+        # Под блокировкой графа: параллельное чтение каталога дождётся
+        # и возьмёт уже сохранённую глубину, писатели не изменят граф посередине
+        _lock_graph(db, graph_id)
+        stats = db.get(GraphStats, graph_id, populate_existing=True)
+        if stats is not None:
+            if stats.depth_stale:
+                node_ids = [id_ for (id_,) in db.query(Node.id).filter_by(graph_id=graph_id)]
+                pairs = db.query(Edge.from_node_id, Edge.to_node_id).filter_by(graph_id=graph_id).all()
+                stats.depth = max(_longest_paths(node_ids, pairs).values(), default=0)
+                stats.depth_stale = False
+            depths[graph_id] = stats.depth
+        db.commit()
+    return depths
+
+
+def _longest_paths(names: list[str], pairs: list[tuple[str, str]]) -> dict[str, int]:
+    """
+    Длина самого длинного пути (в рёбрах), заканчивающегося в каждой вершине.
+    Динамика по топологическому порядку, граф — DAG.
+    """
+    graph = defaultdict(list)
+    indegree = dict.fromkeys(names, 0)
+    for u, v in pairs:
+        graph[u].append(v)
+        indegree[v] += 1
+
+    longest = dict.fromkeys(names, 0)
+    queue = deque(n for n in names if indegree[n] == 0)
+    while queue:
+        current = queue.popleft()
+        for neighbor in graph[current]:
+            longest[neighbor] = max(longest[neighbor], longest[current] + 1)
+            indegree[neighbor] -= 1
+            if indegree[neighbor] == 0:
+                queue.append(neighbor)
+    return longest
+
+
+STATS_FIELDS = (
+    "node_count", "edge_count", "source_count", "sink_count",
+    "max_in_degree", "max_out_degree", "depth",
+)
+
+
+def _graph_stats(names, pairs: list[tuple[str, str]]) -> dict[str, int]:
+    names = list(names)
+    out_degree = Counter(u for u, _ in pairs)
+    in_degree = Counter(v for _, v in pairs)
+    return {
+        "node_count": len(names),
+        "edge_count": len(pairs),
+        "source_count": sum(1 for n in names if in_degree[n] == 0),
+        "sink_count": sum(1 for n in names if out_degree[n] == 0),
+        "max_in_degree": max(in_degree.values(), default=0),
+        "max_out_degree": max(out_degree.values(), default=0),
+        "depth": max(_longest_paths(names, pairs).values(), default=0),
+    }
+
+
+def _save_stats(db: Session, graph_id: int, stats: dict[str, int]) -> None:
+    # Полная статистика — заодно снимает пометку об устаревшей глубине
+    db.merge(GraphStats(graph_id=graph_id, depth_stale=False, **stats))
+
+
+def _load_stats(db: Session, graph_id: int) -> dict[str, int]:
+    # Полный пересчёт по текущим строкам (по id вершин, имена не нужны)
+    node_ids = [id_ for (id_,) in db.query(Node.id).filter_by(graph_id=graph_id)]
+    pairs = [
+        (from_id, to_id)
+        for from_id, to_id in db.query(Edge.from_node_id, Edge.to_node_id).filter_by(graph_id=graph_id)
+    ]
+    return _graph_stats(node_ids, pairs)
+
+
+def _refresh_stats(db: Session, graph_id: int) -> None:
+    _save_stats(db, graph_id, _load_stats(db, graph_id))
+
+
+def _max_degree(graph_id: int, column):
+    # Агрегат по индексу рёбер графа — без выгрузки рёбер в приложение
+    degrees = select(func.count().label("degree")).where(Edge.graph_id == graph_id).group_by(column).subquery()
+    return select(func.coalesce(func.max(degrees.c.degree), 0)).scalar_subquery()
+
+
+def _delete_edges_updating_stats(db: Session, graph_id: int, condition, deleted_node_id: int | None = None) -> int:
+    """
+    Удаляет рёбра графа по condition и инкрементально обновляет статистику.
+    DELETE … RETURNING выполняется в CTE того же запроса, который считает
+    новые истоки и стоки, — в приложение возвращаются только счётчики.
+    Максимумы степеней пересчитываются агрегатом в БД, глубина помечается
+    устаревшей (см. list_graphs). Если удаляется вершина (deleted_node_id),
+    учитывается, была ли она сама истоком или стоком.
+    Возвращает число удалённых рёбер.
+    """
+    removed = (
+        delete(Edge)
+        .where(Edge.graph_id == graph_id, condition)
+        .returning(Edge.id, Edge.from_node_id, Edge.to_node_id)
+        .cte("removed")
+    )
+    # Все части запроса видят данные до удаления: оставшиеся рёбра — те, что не в removed
+    remaining = aliased(Edge)
+    removed_ids = select(removed.c.id).correlate(None)
+
+    def freed(end, remaining_end):
+        # Концы удалённых рёбер, у которых с этой стороны рёбер не осталось
+        query = select(func.count(distinct(end))).where(
+            ~exists().where(remaining_end == end, remaining.id.not_in(removed_ids))
+        )
+        if deleted_node_id is not None:
+            query = query.where(end != deleted_node_id)
+        return query.scalar_subquery()
+
+    def count(*where):
+        return select(func.count()).select_from(removed).where(*where).scalar_subquery()
+
+    columns = [
+        count().label("edges"),
+        freed(removed.c.to_node_id, remaining.to_node_id).label("sources"),
+        freed(removed.c.from_node_id, remaining.from_node_id).label("sinks"),
+    ]
+    if deleted_node_id is not None:
+        columns += [
+            count(removed.c.to_node_id == deleted_node_id).label("into_node"),
+            count(removed.c.from_node_id == deleted_node_id).label("out_of_node"),
+        ]
+    row = db.execute(select(*columns)).one()
+
+    sources, sinks, removed_nodes = row.sources, row.sinks, 0
+    if deleted_node_id is not None:
+        # Удалённая вершина сама могла быть истоком и/или стоком
+        removed_nodes = 1
+        sources -= row.into_node == 0
+        sinks -= row.out_of_node == 0
+
+    values = {
+        GraphStats.node_count: GraphStats.node_count - removed_nodes,
+        GraphStats.edge_count: GraphStats.edge_count - row.edges,
+        GraphStats.source_count: GraphStats.source_count + sources,
+        GraphStats.sink_count: GraphStats.sink_count + sinks,
+    }
+    if row.edges:
+        values[GraphStats.max_in_degree] = _max_degree(graph_id, Edge.to_node_id)
+        values[GraphStats.max_out_degree] = _max_degree(graph_id, Edge.from_node_id)
+        values[GraphStats.depth_stale] = True
+    updated = db.query(GraphStats).filter_by(graph_id=graph_id).update(values, synchronize_session=False)
+    if not updated:
+        _refresh_stats(db, graph_id)
+    return row.edges
+
+
+def _update_stats_for_edge(
+    db: Session,
+    graph_id: int,
+    names: list[str],
+    existing_pairs: list[tuple[str, str]],
+    edge_in: EdgeCreate,
+) -> None:
+    """
+    Инкрементальное обновление при добавлении ребра u → v по уже загруженному
+    графу: степени концов, истоки/стоки и глубина через самый длинный путь,
+    проходящий через новое ребро.
+    """
+    stats = db.get(GraphStats, graph_id)
+    if stats is None or stats.depth_stale:
+        # Граф уже загружен целиком — полный пересчёт ничего не стоит
+        _save_stats(db, graph_id, _graph_stats(names, existing_pairs + [(edge_in.from_node, edge_in.to_node)]))
+        return
+
+    u, v = edge_in.from_node, edge_in.to_node
+    out_u = sum(1 for a, _ in existing_pairs if a == u)
+    in_v = sum(1 for _, b in existing_pairs if b == v)
+
+    stats.edge_count += 1
+    if out_u == 0:
+        stats.sink_count -= 1
+    if in_v == 0:
+        stats.source_count -= 1
+    stats.max_out_degree = max(stats.max_out_degree, out_u + 1)
+    stats.max_in_degree = max(stats.max_in_degree, in_v + 1)
+
+    to_u = _longest_paths(names, existing_pairs)[u]
+    from_v = _longest_paths(names, [(b, a) for a, b in existing_pairs])[v]
+    stats.depth = max(stats.depth, to_u + 1 + from_v)
+
+
 def is_acyclic(nodes: list[NodeCreate], edges: list[EdgeCreate]) -> bool:
     """
     Алгоритм Кана для проверки DAG:
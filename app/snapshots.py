@@ -0,0 +1,253 @@
+"""
+Снимки графов в файлах, общие для всех воркеров через page cache.
+
+Формат файла (нативный порядок байт, секции выровнены по 8 байт):
+
+    заголовок    MAGIC, версия формата, версия графа, n вершин, m рёбер, размер имён
+    node_ids     int64[n]      — id вершин, по возрастанию
+    name_offsets uint32[n + 1] — границы имён в блоке names
+    names        utf-8
+    out_indptr   uint32[n + 1] — CSR исходящих рёбер
+    out_indices  uint32[m]     — индексы вершин-концов
+    out_edge_ids int64[m]      — id рёбер в том же порядке
+    in_indptr    uint32[n + 1] — CSR входящих рёбер (транспонированный граф)
+    in_indices   uint32[m]
+
+Файл пишется один раз на версию графа (во временный файл + os.replace),
+читается через mmap без копирования массивов. Устаревший снимок
+определяется по версии графа в БД — тогда снимок пересобирается из Postgres.
+"""
+import mmap
+import os
+import struct
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import SNAPSHOT_DIR, SNAPSHOT_CACHE_SIZE
+from app.models import Graph, Node, Edge
+
+MAGIC = b"DAGS"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("=4sIqIII")
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def write_snapshot(
+    path: str,
+    version: int,
+    nodes: Iterable[tuple[int, str]],
+    edges: Iterable[tuple[int, int, int]],
+) -> None:
+    """
+    nodes — пары (node_id, name), edges — тройки (edge_id, from_node_id, to_node_id).
+    """
+    nodes = sorted(nodes)
+    index = {node_id: i for i, (node_id, _) in enumerate(nodes)}
+    n = len(nodes)
+
+    node_ids = array("q", (node_id for node_id, _ in nodes))
+    encoded = [name.encode() for _, name in nodes]
+    name_offsets = array("I", [0])
+    for name in encoded:
+        name_offsets.append(name_offsets[-1] + len(name))
+    names = b"".join(encoded)
+
+    # Строки CSR — по исходной (для in — по конечной) вершине, внутри строки — по id ребра
+    out_rows: list[list[tuple[int, int]]] = [[] for _ in range(n)]
+    in_rows: list[list[int]] = [[] for _ in range(n)]
+    m = 0
+    for edge_id, from_id, to_id in sorted(edges):
+        out_rows[index[from_id]].append((index[to_id], edge_id))
+        in_rows[index[to_id]].append(index[from_id])
+        m += 1
+
+    out_indptr, out_indices, out_edge_ids = array("I", [0]), array("I"), array("q")
+    for row in out_rows:
+        for to_idx, edge_id in row:
+            out_indices.append(to_idx)
+            out_edge_ids.append(edge_id)
+        out_indptr.append(len(out_indices))
+
+    in_indptr, in_indices = array("I", [0]), array("I")
+    for row in in_rows:
+        in_indices.extend(row)
+        in_indptr.append(len(in_indices))
+
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, version, n, m, len(names)))
+        for section in (node_ids, name_offsets, names, out_indptr, out_indices, out_edge_ids, in_indptr, in_indices):
+            f.write(b"\0" * (_align(f.tell()) - f.tell()))
+            f.write(section if isinstance(section, bytes) else section.tobytes())
+    # Атомарная замена: читатели видят либо старый файл, либо полностью записанный новый
+    os.replace(tmp_path, path)
+
+
+class Snapshot:
+    """Снимок графа, отображённый в память; массивы — memoryview поверх mmap."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, fmt, self.version, n, m, names_size = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot file: {path}")
+        self.node_count = n
+        self.edge_count = m
+
+        buf = memoryview(self._mmap)
+        offset = _HEADER.size
+
+        def take(size: int, fmt: str | None = None) -> memoryview:
+            nonlocal offset
+            offset = _align(offset)
+            view = buf[offset:offset + size]
+            offset += size
+            return view.cast(fmt) if fmt else view
+
+        q, i = array("q").itemsize, array("I").itemsize
+        self.node_ids = take(n * q, "q")
+        self._name_offsets = take((n + 1) * i, "I")
+        self._names = take(names_size)
+        self.out_indptr = take((n + 1) * i, "I")
+        self.out_indices = take(m * i, "I")
+        self.out_edge_ids = take(m * q, "q")
+        self.in_indptr = take((n + 1) * i, "I")
+        self.in_indices = take(m * i, "I")
+
+    def names(self) -> list[str]:
+        offsets, names = self._name_offsets, self._names
+        return [str(names[offsets[k]:offsets[k + 1]], "utf-8") for k in range(self.node_count)]
+
+    def _rows(self, indptr: memoryview, indices: memoryview) -> dict[str, list[str]]:
+        names = self.names()
+        return {
+            names[k]: [names[j] for j in indices[indptr[k]:indptr[k + 1]]]
+            for k in range(self.node_count)
+        }
+
+    def adjacency(self) -> dict[str, list[str]]:
+        return self._rows(self.out_indptr, self.out_indices)
+
+    def transposed(self) -> dict[str, list[str]]:
+        return self._rows(self.in_indptr, self.in_indices)
+
+    def nodes(self) -> list[tuple[int, str]]:
+        return list(zip(self.node_ids, self.names()))
+
+    def edges(self) -> list[tuple[int, str, str]]:
+        names = self.names()
+        indptr, indices, edge_ids = self.out_indptr, self.out_indices, self.out_edge_ids
+        return [
+            (edge_ids[e], names[k], names[indices[e]])
+            for k in range(self.node_count)
+            for e in range(indptr[k], indptr[k + 1])
+        ]
+
+
+class SnapshotStore:
+    """
+    Открытые снимки одного процесса. Файлы лежат в общем каталоге,
+    поэтому снимок, записанный одним воркером, используют все остальные.
+    Открытыми держим не больше cache_size снимков (LRU): каждый занимает
+    файловый дескриптор и адресное пространство воркера.
+    """
+
+    def __init__(self, directory: str, cache_size: int = SNAPSHOT_CACHE_SIZE):
+        self.directory = directory
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._open: OrderedDict[int, Snapshot] = OrderedDict()
+
+    def _path(self, graph_id: int, version: int) -> str:
+        return os.path.join(self.directory, f"graph_{graph_id}_v{version}.snap")
+
+    def get(self, db: Session, graph_id: int, version: int) -> Snapshot | None:
+        """
+        Снимок версии не ниже version; None — граф удалён, пока собирался снимок.
+        Перед сборкой текущая транзакция db завершается.
+        """
+        with self._lock:
+            snapshot = self._open.get(graph_id)
+            # Более новый снимок тоже подходит: он отражает уже закоммиченные данные
+            if snapshot is not None and snapshot.version >= version:
+                self._open.move_to_end(graph_id)
+                return snapshot
+
+        try:
+            snapshot = Snapshot(self._path(graph_id, version))
+        except FileNotFoundError:
+            # Снимка этой версии ещё нет ни у одного воркера — собираем из Postgres
+            snapshot = self._build(db, graph_id)
+            if snapshot is None:
+                return None
+
+        with self._lock:
+            # Вытесненные снимки не закрываем явно: их ещё могут читать другие потоки,
+            # mmap и дескриптор освободятся, когда исчезнут последние ссылки
+            self._open[graph_id] = snapshot
+            self._open.move_to_end(graph_id)
+            while len(self._open) > self.cache_size:
+                self._open.popitem(last=False)
+        return snapshot
+
+    def _build(self, db: Session, graph_id: int) -> Snapshot | None:
+        # Версия, вершины и рёбра — из одного снимка БД (REPEATABLE READ):
+        # иначе параллельный писатель между запросами даст рёбра к неизвестным
+        # вершинам или файл, подписанный не той версией
+        db.rollback()
+        try:
+            conn = db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+            version = conn.execute(select(Graph.version).filter_by(id=graph_id)).scalar()
+            if version is None:
+                return None
+            nodes = conn.execute(select(Node.id, Node.name).filter_by(graph_id=graph_id)).all()
+            edges = conn.execute(
+                select(Edge.id, Edge.from_node_id, Edge.to_node_id).filter_by(graph_id=graph_id)
+            ).all()
+        finally:
+            db.rollback()
+
+        # Файл называется по версии, которую видела транзакция, а не по запрошенной
+        path = self._path(graph_id, version)
+        os.makedirs(self.directory, exist_ok=True)
+        write_snapshot(path, version, nodes, edges)
+        self._remove_stale(graph_id, below=version)
+        return Snapshot(path)
+
+    def discard(self, graph_id: int) -> None:
+        with self._lock:
+            self._open.pop(graph_id, None)
+        self._remove_stale(graph_id, below=None)
+
+    def _remove_stale(self, graph_id: int, below: int | None) -> None:
+        # Удаляем только более старые версии: читатель с устаревшей версией
+        # не должен стирать свежий снимок, уже записанный другим воркером.
+        # Уже отображённые файлы остаются доступны процессам, открывшим их.
+        prefix, suffix = f"graph_{graph_id}_v", ".snap"
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if not (name.startswith(prefix) and name.endswith(suffix)):
+                continue
+            file_version = name[len(prefix):-len(suffix)]
+            if below is not None and (not file_version.isdigit() or int(file_version) >= below):
+                continue
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+
+snapshot_store = SnapshotStore(SNAPSHOT_DIR)
@@ -0,0 +1,60 @@
+"""Начальная схема: graphs, nodes, edges
+
+Базы, созданные раньше через Base.metadata.create_all, уже содержат
+таблицы — для них миграция только добавляет недостающий graphs.version.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table("graphs"):
+        columns = {c["name"] for c in inspector.get_columns("graphs")}
+        if "version" not in columns:
+            op.add_column("graphs", sa.Column("version", sa.Integer(), nullable=False, server_default="0"))
+        return
+
+    op.create_table(
+        "graphs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("version", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index("ix_graphs_id", "graphs", ["id"])
+    op.create_index("ix_graphs_name", "graphs", ["name"], unique=True)
+
+    op.create_table(
+        "nodes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("graph_id", sa.Integer(), sa.ForeignKey("graphs.id"), nullable=True),
+    )
+    op.create_index("ix_nodes_id", "nodes", ["id"])
+    op.create_index("ix_nodes_name", "nodes", ["name"])
+
+    op.create_table(
+        "edges",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("from_node_id", sa.Integer(), sa.ForeignKey("nodes.id"), nullable=False),
+        sa.Column("to_node_id", sa.Integer(), sa.ForeignKey("nodes.id"), nullable=False),
+        sa.Column("graph_id", sa.Integer(), sa.ForeignKey("graphs.id"), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("edges")
+    op.drop_table("nodes")
+    op.drop_index("ix_graphs_name", table_name="graphs")
+    op.drop_index("ix_graphs_id", table_name="graphs")
+    op.drop_table("graphs")
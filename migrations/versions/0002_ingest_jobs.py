@@ -0,0 +1,31 @@
+"""Таблица фоновых загрузок графов
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ingest_jobs",
+        sa.Column("id", sa.String(32), primary_key=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("progress", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("graph_id", sa.Integer(), sa.ForeignKey("graphs.id"), nullable=True),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ingest_jobs")
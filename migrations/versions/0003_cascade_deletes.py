@@ -0,0 +1,54 @@
+"""ON DELETE CASCADE для вершин и рёбер, индексы по внешним ключам
+
+Удаление графа или вершины — один SQL-оператор: зависимые строки удаляет
+сама БД. Индексы нужны, чтобы каскад не сканировал таблицу edges целиком.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# (таблица, колонка, ссылка, ON DELETE)
+FOREIGN_KEYS = [
+    ("nodes", "graph_id", "graphs", "CASCADE"),
+    ("edges", "from_node_id", "nodes", "CASCADE"),
+    ("edges", "to_node_id", "nodes", "CASCADE"),
+    ("edges", "graph_id", "graphs", "CASCADE"),
+    ("ingest_jobs", "graph_id", "graphs", "SET NULL"),
+]
+
+INDEXES = [
+    ("nodes", "graph_id"),
+    ("edges", "from_node_id"),
+    ("edges", "to_node_id"),
+    ("edges", "graph_id"),
+]
+
+
+def _recreate_foreign_keys(with_ondelete: bool) -> None:
+    for table, column, referent, ondelete in FOREIGN_KEYS:
+        name = f"{table}_{column}_fkey"
+        op.drop_constraint(name, table, type_="foreignkey")
+        op.create_foreign_key(
+            name, table, referent, [column], ["id"],
+            ondelete=ondelete if with_ondelete else None,
+        )
+
+
+def upgrade() -> None:
+    for table, column in INDEXES:
+        op.create_index(f"ix_{table}_{column}", table, [column])
+    _recreate_foreign_keys(with_ondelete=True)
+
+
+def downgrade() -> None:
+    _recreate_foreign_keys(with_ondelete=False)
+    for table, column in INDEXES:
+        op.drop_index(f"ix_{table}_{column}", table_name=table)
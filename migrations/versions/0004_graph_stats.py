@@ -0,0 +1,77 @@
+"""Сводная статистика графов для каталога GET /graphs
+
+Для уже существующих графов статистика считается один раз при миграции.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from collections import defaultdict, deque
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def _stats(node_ids: list[int], edges: list[tuple[int, int]]) -> dict:
+    out_deg, in_deg = defaultdict(int), defaultdict(int)
+    children = defaultdict(list)
+    for u, v in edges:
+        out_deg[u] += 1
+        in_deg[v] += 1
+        children[u].append(v)
+
+    # Самый длинный путь — динамика по топологическому порядку (алгоритм Кана)
+    longest = dict.fromkeys(node_ids, 0)
+    remaining = {n: in_deg[n] for n in node_ids}
+    queue = deque(n for n in node_ids if remaining[n] == 0)
+    while queue:
+        u = queue.popleft()
+        for v in children[u]:
+            longest[v] = max(longest[v], longest[u] + 1)
+            remaining[v] -= 1
+            if remaining[v] == 0:
+                queue.append(v)
+
+    return {
+        "node_count": len(node_ids),
+        "edge_count": len(edges),
+        "source_count": sum(1 for n in node_ids if in_deg[n] == 0),
+        "sink_count": sum(1 for n in node_ids if out_deg[n] == 0),
+        "max_in_degree": max(in_deg.values(), default=0),
+        "max_out_degree": max(out_deg.values(), default=0),
+        "depth": max(longest.values(), default=0),
+    }
+
+
+def upgrade() -> None:
+    graph_stats = op.create_table(
+        "graph_stats",
+        sa.Column("graph_id", sa.Integer(), sa.ForeignKey("graphs.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("node_count", sa.Integer(), nullable=False),
+        sa.Column("edge_count", sa.Integer(), nullable=False),
+        sa.Column("source_count", sa.Integer(), nullable=False),
+        sa.Column("sink_count", sa.Integer(), nullable=False),
+        sa.Column("max_in_degree", sa.Integer(), nullable=False),
+        sa.Column("max_out_degree", sa.Integer(), nullable=False),
+        sa.Column("depth", sa.Integer(), nullable=False),
+    )
+
+    bind = op.get_bind()
+    for (graph_id,) in bind.execute(sa.text("SELECT id FROM graphs")).all():
+        node_ids = [row[0] for row in bind.execute(
+            sa.text("SELECT id FROM nodes WHERE graph_id = :g"), {"g": graph_id}
+        )]
+        edges = [tuple(row) for row in bind.execute(
+            sa.text("SELECT from_node_id, to_node_id FROM edges WHERE graph_id = :g"), {"g": graph_id}
+        )]
+        op.bulk_insert(graph_stats, [{"graph_id": graph_id, **_stats(node_ids, edges)}])
+
+
+def downgrade() -> None:
+    op.drop_table("graph_stats")
@@ -0,0 +1,28 @@
+"""Флаг устаревшей глубины в graph_stats
+
+Удаления обновляют счётчики и максимумы степеней сразу, а глубину только
+помечают устаревшей: её пересчитывает и сохраняет первое чтение каталога.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "graph_stats",
+        sa.Column("depth_stale", sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("graph_stats", "depth_stale")
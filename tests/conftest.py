@@ -1,12 +1,20 @@
 import os
+import tempfile
+
 import pytest
+
+# Схему тестовых баз создаёт фикстура create_test_db, миграции при старте не нужны
+os.environ.setdefault("DB_AUTO_MIGRATE", "false")
+# Снимки графов — в отдельный временный каталог на каждый прогон
+os.environ.setdefault("SNAPSHOT_DIR", tempfile.mkdtemp(prefix="dag-snapshots-"))
 from fastapi.testclient import TestClient
+from fastapi import Request
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, get_read_db, wants_primary
 
 # Используем переменную окружения для подключения к тестовой базе
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://graphuser:graphpass@db:5432/graphdb_test")
@@ -15,6 +23,11 @@ DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://graphuser:graphpass@db:54
 engine = create_engine(DATABASE_URL)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Второй экземпляр Postgres — изображает реплику для чтения
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL", "postgresql://graphuser:graphpass@db_read:5432/graphdb_test")
+read_engine = create_engine(READ_DATABASE_URL)
+TestingReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
 
 # Переопределяем зависимость
 @pytest.fixture()
@@ -26,6 +39,12 @@ def db_session() -> Session:
         db.close()
 
 
+# Фабрика сессий для тестов, где каждый поток работает со своей сессией
+@pytest.fixture()
+def session_factory():
+    return TestingSessionLocal
+
+
 async def override_get_db():
     db = TestingSessionLocal()
     try:
@@ -34,6 +53,14 @@ async def override_get_db():
         db.close()
 
 
+async def override_get_read_db_replica(request: Request):
+    db = TestingSessionLocal() if wants_primary(request) else TestingReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 # Подменяем зависимость FastAPI
 #app.dependency_overrides[get_db] = db_session
 
@@ -41,13 +68,15 @@ async def override_get_db():
 # Создаём схему в тестовой БД
 @pytest.fixture(scope="session", autouse=True)
 def create_test_db():
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
+    for e in (engine, read_engine):
+        Base.metadata.drop_all(bind=e)
+        Base.metadata.create_all(bind=e)
 
 
 @pytest.fixture()
 def client():
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
@@ -56,6 +85,18 @@ def client():
 @pytest.fixture()
 async def async_client():
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        yield ac
+    app.dependency_overrides.clear()
+
+
+# Клиент, у которого GET действительно уходят во второй экземпляр Postgres
+@pytest.fixture()
+async def replica_client():
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_read_db_replica
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+import uuid
+
+import pytest
+
+from app.coalescing import SingleFlight
+
+
+def test_concurrent_calls_share_one_computation():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(timeout=5)
+        return {"adjacency": {}}
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do(("adjacency", 1, 0), compute)))
+    leader.start()
+    started.wait(timeout=5)
+
+    followers = [
+        threading.Thread(target=lambda: results.append(flight.do(("adjacency", 1, 0), compute)))
+        for _ in range(10)
+    ]
+    for t in followers:
+        t.start()
+    # Ждём, пока все последователи встанут в очередь за лидером
+    while flight.stats()["coalesced"] < 10:
+        time.sleep(0.001)
+    release.set()
+    for t in [leader, *followers]:
+        t.join(timeout=5)
+
+    assert len(calls) == 1
+    assert len(results) == 11
+    assert all(r is results[0] for r in results)
+    assert flight.stats() == {"executed": 1, "coalesced": 10, "in_flight": 0}
+
+
+def test_different_keys_are_not_coalesced():
+    flight = SingleFlight()
+    assert flight.do(("adjacency", 1, 0), lambda: "v0") == "v0"
+    assert flight.do(("adjacency", 1, 1), lambda: "v1") == "v1"
+    assert flight.stats()["executed"] == 2
+    assert flight.stats()["coalesced"] == 0
+
+
+def test_exception_is_propagated_and_key_released():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("key", fail)
+    assert flight.do("key", lambda: "ok") == "ok"
+    assert flight.stats()["in_flight"] == 0
+
+
+async def test_async_waiters_share_one_computation_without_threads():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(timeout=5)
+        return {"adjacency": {}}
+
+    # Ожидающих намного больше, чем потоков в пуле (40 по умолчанию):
+    # все встают в очередь, пока единственное вычисление ещё идёт
+    waiters = [asyncio.ensure_future(flight.do_async(("adjacency", 1, 0), compute)) for _ in range(500)]
+    while flight.stats()["executed"] + flight.stats()["coalesced"] < len(waiters):
+        await asyncio.sleep(0.001)
+    assert flight.stats()["in_flight"] == 1
+    release.set()
+    results = await asyncio.gather(*waiters)
+
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert flight.stats() == {"executed": 1, "coalesced": 499, "in_flight": 0}
+
+
+async def test_async_leader_cancellation_does_not_fail_followers():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def compute():
+        release.wait(timeout=5)
+        return "ok"
+
+    leader = asyncio.ensure_future(flight.do_async("key", compute))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(flight.do_async("key", compute))
+    await asyncio.sleep(0)
+    # Клиент лидера отключился — вычисление продолжается для остальных
+    leader.cancel()
+    release.set()
+
+    assert await follower == "ok"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert flight.stats()["executed"] == 1
+
+
+async def test_async_exception_is_propagated_and_key_released():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await flight.do_async("key", fail)
+    assert await flight.do_async("key", lambda: "ok") == "ok"
+    assert flight.stats()["in_flight"] == 0
+
+
+async def test_coalesced_read_releases_connection_before_waiting(db_session):
+    from app import schemas, services
+    from app.routes import _coalesced
+
+    graph = services.create_graph(db_session, schemas.GraphCreate(name=f"Coalesced_{uuid.uuid4().hex[:8]}"))
+    seen = []
+    # К моменту вычисления транзакция сессии запроса завершена и соединение возвращено в пул;
+    # вычисление идёт в своей сессии и получает уже прочитанную версию графа
+    await _coalesced(
+        db_session, "probe", graph.id,
+        lambda db, graph_id, version: seen.append((db_session.in_transaction(), db is db_session, version)),
+    )
+    assert seen == [(False, False, services.get_graph_version(db_session, graph.id))]
@@ -0,0 +1,105 @@
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from threading import Barrier
+
+import pytest
+from fastapi import HTTPException
+
+from app import schemas, services
+
+WRITERS = 16
+
+
+def _create_graph(session_factory, size: int) -> int:
+    db = session_factory()
+    try:
+        graph = services.create_graph(db, schemas.GraphCreate(
+            name=f"Concurrent_{uuid.uuid4().hex[:8]}",
+            nodes=[schemas.NodeCreate(name=f"n{i}") for i in range(size)],
+        ))
+        return graph.id
+    finally:
+        db.close()
+
+
+def _add_edges_concurrently(session_factory, jobs: list[tuple[int, schemas.EdgeCreate]]) -> list[bool]:
+    barrier = Barrier(len(jobs))
+
+    def add(job):
+        graph_id, edge_in = job
+        db = session_factory()
+        try:
+            barrier.wait()
+            services.add_edge(db, graph_id, edge_in)
+            return True
+        except HTTPException:
+            return False
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        return list(pool.map(add, jobs))
+
+
+def test_concurrent_edges_cannot_close_a_cycle(session_factory):
+    # Кольцо n0 → n1 → ... → n0: любое ребро допустимо само по себе,
+    # но все вместе образуют цикл — ровно одно должно быть отклонено
+    graph_id = _create_graph(session_factory, WRITERS)
+    jobs = [
+        (graph_id, schemas.EdgeCreate(from_node=f"n{i}", to_node=f"n{(i + 1) % WRITERS}"))
+        for i in range(WRITERS)
+    ]
+
+    results = _add_edges_concurrently(session_factory, jobs)
+
+    assert results.count(True) == WRITERS - 1
+    db = session_factory()
+    try:
+        details = services.get_graph_details(db, graph_id)
+    finally:
+        db.close()
+    assert len(details.edges) == WRITERS - 1
+    assert services.is_acyclic(
+        [schemas.NodeCreate(name=n.name) for n in details.nodes],
+        [schemas.EdgeCreate(from_node=e.from_node, to_node=e.to_node) for e in details.edges],
+    )
+
+
+def test_concurrent_writers_to_different_graphs(session_factory):
+    graph_ids = [_create_graph(session_factory, 2) for _ in range(WRITERS)]
+    jobs = [(graph_id, schemas.EdgeCreate(from_node="n0", to_node="n1")) for graph_id in graph_ids]
+
+    results = _add_edges_concurrently(session_factory, jobs)
+
+    assert all(results)
+
+
+def test_held_graph_lock_does_not_block_other_graph(session_factory):
+    locked_id = _create_graph(session_factory, 2)
+    other_id = _create_graph(session_factory, 2)
+    edge_in = schemas.EdgeCreate(from_node="n0", to_node="n1")
+
+    holder = session_factory()
+    try:
+        # Блокировка графа держится до конца транзакции holder
+        services._lock_graph(holder, locked_id)
+
+        def add(graph_id):
+            db = session_factory()
+            try:
+                services.add_edge(db, graph_id, edge_in)
+            finally:
+                db.close()
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            other = pool.submit(add, other_id)
+            same = pool.submit(add, locked_id)
+            # Писатель другого графа не ждёт чужую блокировку
+            other.result(timeout=5)
+            # Писатель того же графа ждёт, пока holder не завершит транзакцию
+            with pytest.raises(TimeoutError):
+                same.result(timeout=0.5)
+            holder.rollback()
+            same.result(timeout=5)
+    finally:
+        holder.close()
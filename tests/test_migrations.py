@@ -0,0 +1,109 @@
+import os
+import uuid
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import Column, ForeignKey, Integer, MetaData, String, Table, create_engine, insert, select, text
+from sqlalchemy.pool import NullPool
+
+from app.database import Base
+from app.models import Graph, GraphStats, Node, Edge
+from tests.conftest import engine
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Миграции используют возможности Postgres (ALTER CONSTRAINT, advisory-lock)
+pytestmark = pytest.mark.skipif(engine.dialect.name != "postgresql", reason="migrations target Postgres")
+
+# Схема до появления миграций — так её создавал Base.metadata.create_all
+# (имена ограничений — по умолчанию Postgres)
+baseline = MetaData()
+Table(
+    "graphs", baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, unique=True, index=True),
+)
+Table(
+    "nodes", baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, index=True),
+    Column("graph_id", Integer, ForeignKey("graphs.id")),
+)
+Table(
+    "edges", baseline,
+    Column("id", Integer, primary_key=True),
+    Column("from_node_id", Integer, ForeignKey("nodes.id"), nullable=False),
+    Column("to_node_id", Integer, ForeignKey("nodes.id"), nullable=False),
+    Column("graph_id", Integer, ForeignKey("graphs.id"), nullable=False),
+)
+
+
+# Пустая схема в тестовой БД: миграции идут в неё через search_path
+@pytest.fixture()
+def connection():
+    schema = f"migrations_{uuid.uuid4().hex[:8]}"
+    with create_engine(engine.url, poolclass=NullPool).connect() as conn:
+        conn.execute(text(f'CREATE SCHEMA "{schema}"'))
+        conn.execute(text(f'SET search_path TO "{schema}"'))
+        conn.commit()
+        try:
+            yield conn
+        finally:
+            conn.rollback()
+            conn.execute(text(f'DROP SCHEMA "{schema}" CASCADE'))
+            conn.commit()
+
+
+def _upgrade(conn) -> None:
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.attributes["connection"] = conn
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
+
+
+def _schema_diff(conn) -> list:
+    return compare_metadata(MigrationContext.configure(conn), Base.metadata)
+
+
+def test_upgrade_empty_database(connection):
+    _upgrade(connection)
+    assert _schema_diff(connection) == []
+
+
+def test_upgrade_database_created_by_create_all(connection):
+    baseline.create_all(connection)
+    graphs, nodes, edges = (baseline.tables[name] for name in ("graphs", "nodes", "edges"))
+    # A → B → C, A → C и пустой граф
+    connection.execute(insert(graphs), [{"id": 1, "name": "abc"}, {"id": 2, "name": "empty"}])
+    connection.execute(insert(nodes), [
+        {"id": 1, "name": "A", "graph_id": 1},
+        {"id": 2, "name": "B", "graph_id": 1},
+        {"id": 3, "name": "C", "graph_id": 1},
+    ])
+    connection.execute(insert(edges), [
+        {"from_node_id": 1, "to_node_id": 2, "graph_id": 1},
+        {"from_node_id": 2, "to_node_id": 3, "graph_id": 1},
+        {"from_node_id": 1, "to_node_id": 3, "graph_id": 1},
+    ])
+    connection.commit()
+
+    _upgrade(connection)
+    assert _schema_diff(connection) == []
+
+    # Статистика существующих графов посчитана при миграции
+    stats = {row.graph_id: row for row in connection.execute(select(GraphStats))}
+    assert (
+        stats[1].node_count, stats[1].edge_count, stats[1].source_count, stats[1].sink_count,
+        stats[1].max_in_degree, stats[1].max_out_degree, stats[1].depth, stats[1].depth_stale,
+    ) == (3, 3, 1, 1, 2, 2, 2, False)
+    assert (stats[2].node_count, stats[2].edge_count, stats[2].depth) == (0, 0, 0)
+    assert connection.execute(select(Graph.version)).scalars().all() == [0, 0]
+
+    # Внешние ключи пересозданы с ON DELETE CASCADE
+    connection.execute(Graph.__table__.delete().where(Graph.id == 1))
+    assert connection.execute(select(Node.id)).all() == []
+    assert connection.execute(select(Edge.id)).all() == []
+    assert list(connection.execute(select(GraphStats.graph_id)).scalars()) == [2]
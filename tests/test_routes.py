@@ -1,6 +1,10 @@
+import asyncio
+import uuid
+
 import pytest
 from httpx import AsyncClient, ASGITransport
 from app.main import app
+import app.ingestion as ingestion
 
 graph_payload = {
     "name": "Test Graph",
@@ -89,3 +93,168 @@ async def test_get_transposed_adjacency_list(async_client):
     data = response.json()
     assert "adjacency" in data
     assert isinstance(data["adjacency"], dict)
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica(replica_client):
+    response = await replica_client.post("/api/graph/", json={"name": "Replica Graph"})
+    assert response.status_code == 201
+    created_id = response.json()["id"]
+
+    # Без cookie последней записи чтение уходит в реплику, где графа нет
+    replica_client.cookies.clear()
+    response = await replica_client.get(f"/api/graph/{created_id}/nodes")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_read_your_writes_uses_primary(replica_client):
+    response = await replica_client.post("/api/graph/", json={"name": "RYW Graph"})
+    assert response.status_code == 201
+    assert "last_write" in response.cookies
+    created_id = response.json()["id"]
+
+    # Cookie сохранена клиентом — чтение идёт в основную БД
+    response = await replica_client.get(f"/api/graph/{created_id}/nodes")
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_coalescing_stats(async_client):
+    response = await async_client.get("/api/metrics/coalescing")
+    assert response.status_code == 200
+    assert set(response.json()) == {"executed", "coalesced", "in_flight"}
+
+
+@pytest.mark.asyncio
+async def test_create_graph_with_edges(async_client):
+    payload = {
+        "name": "Graph With Edges",
+        "nodes": [{"name": "A"}, {"name": "B"}],
+        "edges": [{"from_node": "A", "to_node": "B"}],
+    }
+    response = await async_client.post("/api/graph/", json=payload)
+    assert response.status_code == 201
+    assert response.json()["edges"][0]["from_node"] == "A"
+    assert response.json()["edges"][0]["to_node"] == "B"
+
+
+@pytest.mark.asyncio
+async def test_sync_graph(async_client):
+    payload = {
+        "name": "Test Graph",
+        "nodes": [{"name": "A"}, {"name": "B"}, {"name": "C"}],
+        "edges": [{"from_node": "A", "to_node": "B"}, {"from_node": "B", "to_node": "C"}],
+    }
+    response = await async_client.put(f"/api/graph/{graph_id}", json=payload)
+    assert response.status_code == 200
+    assert response.json() == {"nodes_added": 1, "nodes_removed": 0, "edges_added": 1, "edges_removed": 0}
+
+
+async def _wait_for_job(async_client, job_id: str) -> dict:
+    for _ in range(100):
+        response = await async_client.get(f"/api/jobs/{job_id}")
+        assert response.status_code == 200
+        job = response.json()
+        if job["status"] in ("done", "failed"):
+            return job
+        await asyncio.sleep(0.05)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+@pytest.mark.asyncio
+async def test_create_graph_async(async_client):
+    payload = {
+        "name": "Async Graph",
+        "nodes": [{"name": "A"}, {"name": "B"}],
+        "edges": [{"from_node": "A", "to_node": "B"}],
+    }
+    response = await async_client.post("/api/graph/async", json=payload)
+    assert response.status_code == 202
+    assert response.headers["location"].endswith(f"/api/jobs/{response.json()['id']}")
+
+    job = await _wait_for_job(async_client, response.json()["id"])
+    assert job["status"] == "done"
+    assert job["progress"] == 1.0
+
+    response = await async_client.get(f"/api/graph/{job['graph_id']}/adjacency")
+    assert response.json()["adjacency"] == {"A": ["B"], "B": []}
+
+
+@pytest.mark.asyncio
+async def test_create_graph_async_invalid_payload(async_client):
+    response = await async_client.post("/api/graph/async", content=b'{"name": "Broken", "nodes": [')
+    assert response.status_code == 202
+
+    job = await _wait_for_job(async_client, response.json()["id"])
+    assert job["status"] == "failed"
+    assert job["graph_id"] is None
+    assert job["error"]
+
+
+@pytest.mark.asyncio
+async def test_create_graph_async_duplicate_name(async_client):
+    payload = {**graph_payload, "name": f"Async Duplicate {uuid.uuid4().hex[:8]}"}
+    assert (await async_client.post("/api/graph/", json=payload)).status_code == 201
+
+    response = await async_client.post("/api/graph/async", json=payload)
+    job = await _wait_for_job(async_client, response.json()["id"])
+    assert job["status"] == "failed"
+    assert job["error"] == f"Graph '{payload['name']}' already exists."
+
+    # Синхронная загрузка отвечает той же ошибкой валидации, а не 500
+    response = await async_client.post("/api/graph/", json=payload)
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_create_graph_async_too_large(async_client, monkeypatch, tmp_path):
+    monkeypatch.setattr(ingestion, "INGEST_DIR", str(tmp_path))
+    monkeypatch.setattr(ingestion, "INGEST_MAX_BYTES", 16)
+    response = await async_client.post("/api/graph/async", json=graph_payload)
+    assert response.status_code == 413
+    # Недописанный файл удалён
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_get_job_not_found(async_client):
+    response = await async_client.get("/api/jobs/missing")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_delete_edges_node_and_graph(async_client):
+    response = await async_client.request(
+        "DELETE", f"/api/graph/{graph_id}/edges", json=[{"from_node": "B", "to_node": "C"}]
+    )
+    assert response.status_code == 200
+    assert response.json() == {"deleted": 1}
+
+    response = await async_client.delete(f"/api/graph/{graph_id}/node/C")
+    assert response.status_code == 204
+
+    response = await async_client.get(f"/api/graph/{graph_id}/nodes")
+    assert {n["name"] for n in response.json()} == {"A", "B"}
+
+    response = await async_client.delete(f"/api/graph/{graph_id}")
+    assert response.status_code == 204
+    response = await async_client.get(f"/api/graph/{graph_id}")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_list_graphs(async_client):
+    response = await async_client.post("/api/graph/", json={
+        "name": "Catalog Graph",
+        "nodes": [{"name": "A"}, {"name": "B"}],
+        "edges": [{"from_node": "A", "to_node": "B"}],
+    })
+    created_id = response.json()["id"]
+
+    response = await async_client.get("/api/graphs", params={"limit": 1000})
+    assert response.status_code == 200
+    summary = next(g for g in response.json() if g["id"] == created_id)
+    assert summary["node_count"] == 2
+    assert summary["edge_count"] == 1
+    assert summary["depth"] == 1
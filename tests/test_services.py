@@ -2,7 +2,7 @@ import pytest
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from app import schemas, services
-from app.models import Graph, Node, Edge
+from app.models import Graph, Node, Edge, GraphStats
 from app.services import create_graph, get_graph_details, add_edge, add_node
 import uuid
 
@@ -198,4 +198,215 @@ def test_add_edge_creates_cycle(db_session: Session, graph: Graph):
         services.add_edge(db_session, graph.id, schemas.EdgeCreate(from_node="C", to_node="A"))
 
     assert e.value.status_code == 400
-    assert "create a cycle" in e.value.detail
\ No newline at end of file
+    assert "create a cycle" in e.value.detail
+
+
+def test_sync_graph_applies_only_diff(db_session: Session):
+    graph = create_graph(db_session, schemas.GraphCreate(
+        name=f"SyncGraph_{uuid.uuid4().hex[:8]}",
+        nodes=[schemas.NodeCreate(name=n) for n in ["A", "B", "C"]],
+        edges=[
+            schemas.EdgeCreate(from_node="A", to_node="B"),
+            schemas.EdgeCreate(from_node="B", to_node="C"),
+        ]
+    ))
+    kept_edge_id = next(e.id for e in get_graph_details(db_session, graph.id).edges if e.from_node == "A")
+
+    # C удалена (вместе с B → C), добавлены D и A → D
+    diff = services.sync_graph(db_session, graph.id, schemas.GraphCreate(
+        name=graph.name,
+        nodes=[schemas.NodeCreate(name=n) for n in ["A", "B", "D"]],
+        edges=[
+            schemas.EdgeCreate(from_node="A", to_node="B"),
+            schemas.EdgeCreate(from_node="A", to_node="D"),
+        ]
+    ))
+    assert diff == schemas.GraphDiff(nodes_added=1, nodes_removed=1, edges_added=1, edges_removed=1)
+
+    details = get_graph_details(db_session, graph.id)
+    assert {n.name for n in details.nodes} == {"A", "B", "D"}
+    assert {(e.from_node, e.to_node) for e in details.edges} == {("A", "B"), ("A", "D")}
+    # Неизменённое ребро не переписывалось
+    assert kept_edge_id in {e.id for e in details.edges}
+
+
+def test_sync_graph_unchanged_is_noop(db_session: Session):
+    payload = schemas.GraphCreate(
+        name=f"SyncNoop_{uuid.uuid4().hex[:8]}",
+        nodes=[schemas.NodeCreate(name="A"), schemas.NodeCreate(name="B")],
+        edges=[schemas.EdgeCreate(from_node="A", to_node="B")]
+    )
+    graph = create_graph(db_session, payload)
+    version = services.get_graph_version(db_session, graph.id)
+
+    diff = services.sync_graph(db_session, graph.id, payload)
+    assert diff == schemas.GraphDiff(nodes_added=0, nodes_removed=0, edges_added=0, edges_removed=0)
+    assert services.get_graph_version(db_session, graph.id) == version
+
+
+def test_sync_graph_rejects_cycle(db_session: Session):
+    graph = create_graph(db_session, schemas.GraphCreate(
+        name=f"SyncCycle_{uuid.uuid4().hex[:8]}",
+        nodes=[schemas.NodeCreate(name="A"), schemas.NodeCreate(name="B")],
+        edges=[schemas.EdgeCreate(from_node="A", to_node="B")]
+    ))
+    with pytest.raises(HTTPException) as e:
+        services.sync_graph(db_session, graph.id, schemas.GraphCreate(
+            name=graph.name,
+            nodes=[schemas.NodeCreate(name="A"), schemas.NodeCreate(name="B")],
+            edges=[
+                schemas.EdgeCreate(from_node="A", to_node="B"),
+                schemas.EdgeCreate(from_node="B", to_node="A"),
+            ]
+        ))
+    assert e.value.status_code == 400
+    assert len(get_graph_details(db_session, graph.id).edges) == 1
+
+
+def test_sync_graph_not_found(db_session: Session):
+    with pytest.raises(HTTPException) as e:
+        services.sync_graph(db_session, 9999, schemas.GraphCreate(name="Missing"))
+    assert e.value.status_code == 404
+
+
+@pytest.fixture
+def abc_graph(db_session):
+    # A → B → C, A → C
+    return create_graph(db_session, schemas.GraphCreate(
+        name=f"DeleteGraph_{uuid.uuid4().hex[:8]}",
+        nodes=[schemas.NodeCreate(name=n) for n in ["A", "B", "C"]],
+        edges=[
+            schemas.EdgeCreate(from_node="A", to_node="B"),
+            schemas.EdgeCreate(from_node="B", to_node="C"),
+            schemas.EdgeCreate(from_node="A", to_node="C"),
+        ]
+    ))
+
+
+def test_delete_graph_cascades(db_session: Session, abc_graph: Graph):
+    graph_id = abc_graph.id
+    services.delete_graph(db_session, graph_id)
+
+    assert db_session.query(Graph).filter_by(id=graph_id).count() == 0
+    assert db_session.query(Node).filter_by(graph_id=graph_id).count() == 0
+    assert db_session.query(Edge).filter_by(graph_id=graph_id).count() == 0
+
+
+def test_delete_graph_not_found(db_session: Session):
+    with pytest.raises(HTTPException) as e:
+        services.delete_graph(db_session, 9999)
+    assert e.value.status_code == 404
+
+
+def test_delete_node_removes_incident_edges(db_session: Session, abc_graph: Graph):
+    services.delete_node(db_session, abc_graph.id, "B")
+
+    details = get_graph_details(db_session, abc_graph.id)
+    assert {n.name for n in details.nodes} == {"A", "C"}
+    assert {(e.from_node, e.to_node) for e in details.edges} == {("A", "C")}
+
+
+def test_delete_node_not_found(db_session: Session, abc_graph: Graph):
+    with pytest.raises(HTTPException) as e:
+        services.delete_node(db_session, abc_graph.id, "Z")
+    assert e.value.status_code == 404
+    assert "not found" in e.value.detail
+
+
+def test_delete_edges_bulk(db_session: Session, abc_graph: Graph):
+    result = services.delete_edges(db_session, abc_graph.id, [
+        schemas.EdgeCreate(from_node="A", to_node="B"),
+        schemas.EdgeCreate(from_node="A", to_node="C"),
+        schemas.EdgeCreate(from_node="C", to_node="A"),  # такого ребра нет
+    ])
+    assert result.deleted == 2
+
+    details = get_graph_details(db_session, abc_graph.id)
+    assert len(details.nodes) == 3
+    assert {(e.from_node, e.to_node) for e in details.edges} == {("B", "C")}
+
+
+def _stats_of(db_session: Session, graph_id: int) -> dict:
+    summary = next(s for s in services.list_graphs(db_session, limit=1000, offset=0) if s.id == graph_id)
+    return summary.model_dump(exclude={"id", "name", "version"})
+
+
+def _recomputed_stats(db_session: Session, graph_id: int) -> dict:
+    details = get_graph_details(db_session, graph_id)
+    return services._graph_stats(
+        [n.name for n in details.nodes],
+        [(e.from_node, e.to_node) for e in details.edges],
+    )
+
+
+def test_graph_stats_on_create(db_session: Session, abc_graph: Graph):
+    assert _stats_of(db_session, abc_graph.id) == {
+        "node_count": 3,
+        "edge_count": 3,
+        "source_count": 1,
+        "sink_count": 1,
+        "max_in_degree": 2,
+        "max_out_degree": 2,
+        "depth": 2,
+    }
+
+
+def test_graph_stats_incremental_updates(db_session: Session, graph: Graph):
+    for name in ["A", "B", "C", "D", "E"]:
+        services.add_node(db_session, graph.id, schemas.NodeCreate(name=name))
+    assert _stats_of(db_session, graph.id)["source_count"] == 5
+
+    # Ребро D → E соединяет две цепочки: A → B → C → D → E
+    for u, v in [("A", "B"), ("D", "E"), ("B", "C"), ("C", "D"), ("A", "E")]:
+        services.add_edge(db_session, graph.id, schemas.EdgeCreate(from_node=u, to_node=v))
+        assert _stats_of(db_session, graph.id) == _recomputed_stats(db_session, graph.id)
+
+    assert _stats_of(db_session, graph.id)["depth"] == 4
+
+
+def test_graph_stats_after_deletes(db_session: Session, abc_graph: Graph):
+    services.delete_edges(db_session, abc_graph.id, [schemas.EdgeCreate(from_node="B", to_node="C")])
+    assert _stats_of(db_session, abc_graph.id) == _recomputed_stats(db_session, abc_graph.id)
+
+    services.delete_node(db_session, abc_graph.id, "A")
+    assert _stats_of(db_session, abc_graph.id) == _recomputed_stats(db_session, abc_graph.id)
+    assert _stats_of(db_session, abc_graph.id)["depth"] == 0
+
+
+def test_graph_stats_deletes_update_stats_and_defer_depth(db_session: Session, graph: Graph):
+    # A → B → C → D, A → D, A → C, E изолирована
+    for name in ["A", "B", "C", "D", "E"]:
+        add_node(db_session, graph.id, schemas.NodeCreate(name=name))
+    for u, v in [("A", "B"), ("B", "C"), ("C", "D"), ("A", "D"), ("A", "C")]:
+        add_edge(db_session, graph.id, schemas.EdgeCreate(from_node=u, to_node=v))
+
+    def stored():
+        db_session.expire_all()
+        stats = db_session.get(GraphStats, graph.id)
+        return {field: getattr(stats, field) for field in services.STATS_FIELDS}, stats.depth_stale
+
+    def without_depth(values):
+        return {k: v for k, v in values.items() if k != "depth"}
+
+    services.delete_node(db_session, graph.id, "E")
+    assert stored() == (_recomputed_stats(db_session, graph.id), False)
+
+    # Всё, кроме глубины, обновлено сразу; глубина в таблице ещё прежняя
+    services.delete_node(db_session, graph.id, "C")
+    values, depth_stale = stored()
+    expected = _recomputed_stats(db_session, graph.id)
+    assert without_depth(values) == without_depth(expected)
+    assert depth_stale and values["depth"] == 3
+
+    # Каталог пересчитывает глубину один раз и сохраняет её
+    assert _stats_of(db_session, graph.id) == expected
+    assert stored() == (expected, False)
+
+    services.delete_edges(db_session, graph.id, [schemas.EdgeCreate(from_node="A", to_node="D")])
+    values, depth_stale = stored()
+    assert without_depth(values) == without_depth(_recomputed_stats(db_session, graph.id))
+    assert depth_stale
+
+    # Добавление ребра загружает граф целиком и сохраняет точную статистику
+    add_edge(db_session, graph.id, schemas.EdgeCreate(from_node="B", to_node="D"))
+    assert stored() == (_recomputed_stats(db_session, graph.id), False)
@@ -0,0 +1,92 @@
+import os
+import uuid
+
+from sqlalchemy.orm import Session
+
+from app import schemas, services
+from app.snapshots import Snapshot, SnapshotStore, write_snapshot
+
+
+def test_snapshot_roundtrip(tmp_path):
+    path = str(tmp_path / "graph.snap")
+    nodes = [(30, "C"), (10, "A"), (20, "Б")]
+    edges = [(2, 10, 30), (1, 10, 20), (3, 20, 30)]
+    write_snapshot(path, 7, nodes, edges)
+
+    snapshot = Snapshot(path)
+    assert snapshot.version == 7
+    assert snapshot.nodes() == [(10, "A"), (20, "Б"), (30, "C")]
+    assert snapshot.adjacency() == {"A": ["Б", "C"], "Б": ["C"], "C": []}
+    assert snapshot.transposed() == {"A": [], "Б": ["A"], "C": ["A", "Б"]}
+    assert snapshot.edges() == [(1, "A", "Б"), (2, "A", "C"), (3, "Б", "C")]
+
+
+def test_empty_snapshot(tmp_path):
+    path = str(tmp_path / "empty.snap")
+    write_snapshot(path, 0, [], [])
+
+    snapshot = Snapshot(path)
+    assert snapshot.adjacency() == {}
+    assert snapshot.edges() == []
+
+
+def test_store_rebuilds_only_when_version_changes(db_session: Session, tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    graph = services.create_graph(db_session, schemas.GraphCreate(
+        name=f"Snapshot_{uuid.uuid4().hex[:8]}",
+        nodes=[schemas.NodeCreate(name="A"), schemas.NodeCreate(name="B")],
+    ))
+
+    version = services.get_graph_version(db_session, graph.id)
+    first = store.get(db_session, graph.id, version)
+    assert store.get(db_session, graph.id, version) is first
+    assert first.adjacency() == {"A": [], "B": []}
+
+    services.add_edge(db_session, graph.id, schemas.EdgeCreate(from_node="A", to_node="B"))
+    new_version = services.get_graph_version(db_session, graph.id)
+    second = store.get(db_session, graph.id, new_version)
+    assert second.version == new_version
+    assert second.adjacency() == {"A": ["B"], "B": []}
+    # Устаревший файл удалён, на диске один снимок графа
+    assert os.listdir(tmp_path) == [f"graph_{graph.id}_v{new_version}.snap"]
+
+    store.discard(graph.id)
+    assert os.listdir(tmp_path) == []
+
+
+def _create_graph(db: Session, nodes: list[str]) -> int:
+    graph = services.create_graph(db, schemas.GraphCreate(
+        name=f"Snapshot_{uuid.uuid4().hex[:8]}",
+        nodes=[schemas.NodeCreate(name=name) for name in nodes],
+    ))
+    return graph.id
+
+
+def test_store_labels_snapshot_with_version_it_read(db_session: Session, tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    graph_id = _create_graph(db_session, ["A", "B"])
+    stale_version = services.get_graph_version(db_session, graph_id)
+    services.add_edge(db_session, graph_id, schemas.EdgeCreate(from_node="A", to_node="B"))
+
+    # Запрошена устаревшая версия: файл подписан той, что видела сборка
+    snapshot = store.get(db_session, graph_id, stale_version)
+    current_version = services.get_graph_version(db_session, graph_id)
+    assert snapshot.version == current_version > stale_version
+    assert snapshot.adjacency() == {"A": ["B"], "B": []}
+    assert os.listdir(tmp_path) == [f"graph_{graph_id}_v{current_version}.snap"]
+
+
+def test_store_keeps_bounded_number_of_open_snapshots(db_session: Session, tmp_path):
+    store = SnapshotStore(str(tmp_path), cache_size=2)
+    graph_ids = [_create_graph(db_session, ["A"]) for _ in range(3)]
+    snapshots = [
+        store.get(db_session, graph_id, services.get_graph_version(db_session, graph_id))
+        for graph_id in graph_ids
+    ]
+
+    # Первый снимок вытеснен; повторное обращение открывает файл заново
+    assert list(store._open) == graph_ids[1:]
+    reopened = store.get(db_session, graph_ids[0], snapshots[0].version)
+    assert reopened is not snapshots[0]
+    assert reopened.nodes() == snapshots[0].nodes()
+    assert list(store._open) == [graph_ids[2], graph_ids[0]]